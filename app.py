@@ -10,8 +10,12 @@ Author: AI Assistant
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 import os
+import re
 import json
+import threading
 from datetime import datetime
+import redis
+from cachetools import TTLCache
 from zillow_image_scraper import (
     fetch_page_content, 
     extract_json_from_page, 
@@ -19,6 +23,7 @@ from zillow_image_scraper import (
     extract_images_from_html,
     filter_unique_images,
     download_and_upload_to_s3,
+    download_and_upload_to_s3_parallel,
     generate_listing_id
 )
 
@@ -27,9 +32,102 @@ app = Flask(__name__)
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['PARALLEL_UPLOADS'] = os.environ.get('PARALLEL_UPLOADS', 'true').lower() == 'true'
+app.config['UPLOAD_CONCURRENCY'] = int(os.environ.get('UPLOAD_CONCURRENCY', 10))
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL')
+app.config['MAX_URL_LENGTH'] = 2048
+app.config['JOB_TTL_SECONDS'] = int(os.environ.get('JOB_TTL_SECONDS', 3600))
+app.config['MAX_LOCAL_JOBS'] = int(os.environ.get('MAX_LOCAL_JOBS', 10000))
 
-# Global variables to store results
-processing_results = {}
+# Job state lives in Redis when REDIS_URL is set so it is shared across workers and
+# expires automatically; otherwise fall back to a bounded in-process cache for local development.
+if app.config['REDIS_URL']:
+    redis_client = redis.Redis(
+        connection_pool=redis.BlockingConnectionPool.from_url(
+            app.config['REDIS_URL'], max_connections=32
+        )
+    )
+else:
+    redis_client = None
+
+# Zillow listing URL; the path is bounded and has no nested quantifiers, so matching is linear
+ZILLOW_URL_PATTERN = re.compile(r'^https://www\.zillow\.com/[^?#\s]{1,512}(?:[?#]|$)')
+
+processing_results = TTLCache(maxsize=app.config['MAX_LOCAL_JOBS'], ttl=app.config['JOB_TTL_SECONDS'])
+# Requests are served on multiple threads and TTLCache is not thread-safe, so all access is serialized
+processing_results_lock = threading.Lock()
+
+
+def _job_key(job_id):
+    return f"job:{job_id}"
+
+
+def save_job(job_id, state):
+    """
+    Store the full state of a job, replacing any previous state.
+    
+    Args:
+        job_id (str): Unique job identifier
+        state (dict): Job state
+    """
+    if redis_client is None:
+        with processing_results_lock:
+            processing_results[job_id] = dict(state)
+        return
+    
+    key = _job_key(job_id)
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    pipe.hset(key, mapping={field: json.dumps(value) for field, value in state.items()})
+    pipe.expire(key, app.config['JOB_TTL_SECONDS'])
+    pipe.execute()
+
+
+def update_job(job_id, fields):
+    """
+    Update individual fields of a stored job.
+    
+    Each field is written independently, so concurrent updates never need a
+    read-modify-write of the whole job.
+    
+    Args:
+        job_id (str): Unique job identifier
+        fields (dict): Fields to set
+    """
+    if redis_client is None:
+        with processing_results_lock:
+            # Re-assign so the entry's TTL restarts, matching the Redis expiry refresh
+            job = processing_results.get(job_id, {})
+            job.update(fields)
+            processing_results[job_id] = job
+        return
+    
+    key = _job_key(job_id)
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping={field: json.dumps(value) for field, value in fields.items()})
+    pipe.expire(key, app.config['JOB_TTL_SECONDS'])
+    pipe.execute()
+
+
+def get_job(job_id):
+    """
+    Fetch the state of a job.
+    
+    Args:
+        job_id (str): Unique job identifier
+        
+    Returns:
+        dict: Job state, or None if the job is unknown or has expired
+    """
+    if redis_client is None:
+        with processing_results_lock:
+            result = processing_results.get(job_id)
+            return dict(result) if result is not None else None
+    
+    raw = redis_client.hgetall(_job_key(job_id))
+    if not raw:
+        return None
+    return {field.decode(): json.loads(value) for field, value in raw.items()}
 
 @app.route('/')
 def index():
@@ -46,26 +144,26 @@ def process_url():
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        if not url.startswith('https://www.zillow.com/'):
+        if len(url) > app.config['MAX_URL_LENGTH'] or not ZILLOW_URL_PATTERN.match(url):
             return jsonify({'error': 'Please provide a valid Zillow listing URL'}), 400
         
         # Generate unique job ID
         job_id = generate_listing_id(url)
         
         # Store initial status
-        processing_results[job_id] = {
+        save_job(job_id, {
             'status': 'processing',
             'url': url,
             'started_at': datetime.now().isoformat(),
             'images': [],
             'error': None
-        }
+        })
         
-        # Process the URL
+        # Process the URL (network-bound, runs outside the lock)
         result = process_zillow_url(url, job_id)
         
         # Update results
-        processing_results[job_id].update(result)
+        update_job(job_id, result)
         
         return jsonify({
             'job_id': job_id,
@@ -81,10 +179,10 @@ def process_url():
 @app.route('/status/<job_id>')
 def get_status(job_id):
     """Get the status of a processing job."""
-    if job_id not in processing_results:
+    result = get_job(job_id)
+    if result is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    result = processing_results[job_id]
     return jsonify({
         'job_id': job_id,
         'status': result['status'],
@@ -98,19 +196,19 @@ def get_status(job_id):
 @app.route('/results/<job_id>')
 def get_results(job_id):
     """Get detailed results for a completed job."""
-    if job_id not in processing_results:
+    result = get_job(job_id)
+    if result is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    result = processing_results[job_id]
     return jsonify(result)
 
 @app.route('/gallery/<job_id>')
 def view_gallery(job_id):
     """View the image gallery for a completed job."""
-    if job_id not in processing_results:
+    result = get_job(job_id)
+    if result is None:
         return render_template('error.html', message='Job not found'), 404
     
-    result = processing_results[job_id]
     if result['status'] != 'completed':
         return render_template('error.html', message='Job not completed yet'), 400
     
@@ -163,7 +261,12 @@ def process_zillow_url(url, job_id):
             }
         
         # Upload to S3
-        s3_result = download_and_upload_to_s3(image_urls, job_id)
+        if app.config['PARALLEL_UPLOADS']:
+            s3_result = download_and_upload_to_s3_parallel(
+                image_urls, job_id, max_workers=app.config['UPLOAD_CONCURRENCY']
+            )
+        else:
+            s3_result = download_and_upload_to_s3(image_urls, job_id)
         
         return {
             'status': 'completed',
@@ -171,7 +274,8 @@ def process_zillow_url(url, job_id):
             'images': image_urls,
             's3_urls': s3_result.get('s3_urls', []),
             'upload_success': s3_result.get('success', 0),
-            'upload_total': s3_result.get('total', 0)
+            'upload_total': s3_result.get('total', 0),
+            'upload_failed': s3_result.get('failed', [])
         }
         
     except Exception as e:
@@ -200,4 +304,4 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
@@ -6,12 +6,16 @@ using Amazon Bedrock LLM for generating recommendations.
 import json
 import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 from utils.bedrock_client import BedrockClient
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Stream model output rather than waiting for a single buffered response body
+LLM_STREAMING = os.environ.get('LLM_STREAMING', 'true').lower() == 'true'
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler for LLM-based accessibility analysis.
@@ -37,17 +41,23 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'No rekognition results provided'})
             }
         
-        # Generate accessibility recommendations
-        recommendations = bedrock_client.generate_accessibility_recommendations(
-            rekognition_results,
-            image_metadata
-        )
-        
-        # Generate improvement suggestions
-        improvements = bedrock_client.generate_improvement_suggestions(
-            rekognition_results,
-            image_metadata
-        )
+        # Generate recommendations and improvement suggestions concurrently;
+        # the two Bedrock calls are independent, so latency is the slower of the two
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            recommendations_future = executor.submit(
+                bedrock_client.generate_accessibility_recommendations,
+                rekognition_results,
+                image_metadata,
+                stream=LLM_STREAMING
+            )
+            improvements_future = executor.submit(
+                bedrock_client.generate_improvement_suggestions,
+                rekognition_results,
+                image_metadata,
+                stream=LLM_STREAMING
+            )
+            recommendations = recommendations_future.result()
+            improvements = improvements_future.result()
         
         logger.info("Successfully generated LLM recommendations")
         
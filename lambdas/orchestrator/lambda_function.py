@@ -4,9 +4,19 @@ Coordinates Rekognition and LLM Lambda functions to provide comprehensive assess
 """
 
 import json
+import logging
+import orjson
+import re
+import time
+import uuid
+from array import array
+from itertools import chain, compress
 import boto3
 import os
-from typing import Dict, Any, List
+from botocore.config import Config
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import custom modules
@@ -15,16 +25,109 @@ from utils.exceptions import (
     InvalidInputError, LambdaInvocationError, AccessibilityCheckerError,
     handle_aws_error
 )
-from utils.validation import AnalyzeRequest
 from utils.cache import ConnectionPool, ImageAnalysisCache, PerformanceMonitor
+from utils.accessibility_labels import detect_labels_for_image
 from utils.batch_processor import RekognitionBatchProcessor
 from utils.streaming_llm import StreamingLLMClient
 
 # Initialize structured logger
 logger = get_logger(__name__)
 
-# Initialize AWS clients with connection pooling
-lambda_client = ConnectionPool.get_client('lambda')
+# Maximum number of in-flight Rekognition Lambda invocations
+REKOGNITION_CONCURRENCY = int(os.environ.get('REKOGNITION_CONCURRENCY', 20))
+
+# Initialize AWS clients with connection pooling; the HTTP pool must be at least as
+# large as the fan-out, so it only grows past the shared pool's 64 sockets
+MAX_POOL_CONNECTIONS = max(ConnectionPool.DEFAULT_CONFIG.max_pool_connections, REKOGNITION_CONCURRENCY)
+lambda_client = ConnectionPool.get_client(
+    'lambda',
+    config=Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+)
+
+# Call Rekognition in-process instead of invoking the Rekognition Lambda per image,
+# saving an invoke round trip (and a possible cold start) for every photo
+REKOGNITION_INLINE = os.environ.get('REKOGNITION_INLINE', 'true').lower() == 'true'
+rekognition_client = ConnectionPool.get_client(
+    'rekognition',
+    config=Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+)
+
+# Rekognition Lambda the orchestrator fans out to when REKOGNITION_INLINE is off
+REKOGNITION_FUNCTION_NAME = os.environ.get('REKOGNITION_FUNCTION_NAME', 'rekognition-handler')
+
+# When set (and REKOGNITION_INLINE is off), Rekognition is invoked asynchronously and
+# results are collected from a reply queue created per run under this name prefix
+RESULTS_QUEUE_PREFIX = os.environ.get('RESULTS_QUEUE_PREFIX')
+RESULTS_WAIT_SECONDS = int(os.environ.get('RESULTS_WAIT_SECONDS', 50))
+
+s3_client = ConnectionPool.get_client('s3')
+
+# Rekognition results keyed by S3 ETag, so identical photos shared across listings are analyzed once
+CACHE_TABLE_NAME = os.environ.get('CACHE_TABLE_NAME')
+rekognition_cache = ImageAnalysisCache(CACHE_TABLE_NAME) if CACHE_TABLE_NAME else None
+
+# Return the assessment dict itself (no statusCode/body envelope) for Lambda or
+# Step Functions callers that would otherwise have to re-parse the body
+ORCH_RAW_RETURN = os.environ.get('ORCH_RAW_RETURN', '').lower() in ('1', 'true')
+
+# Accessibility keyword sets used for scoring and categorization
+SCORE_POSITIVE_KEYWORDS = frozenset({'ramp', 'elevator', 'lift', 'handrail', 'grab bar', 'accessible'})
+SCORE_NEGATIVE_KEYWORDS = frozenset({'stairs', 'step', 'threshold', 'narrow', 'obstacle'})
+POSITIVE_KEYWORDS = SCORE_POSITIVE_KEYWORDS | {'wide'}
+BARRIER_KEYWORDS = SCORE_NEGATIVE_KEYWORDS | {'clutter'}
+
+
+def _compile_keywords(keywords) -> re.Pattern:
+    """Compile a keyword set into a single substring-matching pattern."""
+    return re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+
+# Compiled once per container so each label is matched in a single scan
+SCORE_POSITIVE_PATTERN = _compile_keywords(SCORE_POSITIVE_KEYWORDS)
+SCORE_NEGATIVE_PATTERN = _compile_keywords(SCORE_NEGATIVE_KEYWORDS)
+POSITIVE_PATTERN = _compile_keywords(POSITIVE_KEYWORDS)
+BARRIER_PATTERN = _compile_keywords(BARRIER_KEYWORDS)
+
+# Score contribution of a label, stored per label in LabelBatch.kinds
+KIND_NEUTRAL = 0
+KIND_POSITIVE = 1
+KIND_NEGATIVE = 2
+
+# Categorization of a label, stored per label in LabelBatch.categories
+CATEGORY_NONE = 0
+CATEGORY_POSITIVE = 1
+CATEGORY_BARRIER = 2
+
+
+@lru_cache(maxsize=4096)
+def _classify_label_name(name: str) -> Tuple[int, int]:
+    """
+    Classify a label name case-insensitively.
+    
+    Rekognition returns the same few dozen names across every image, so results
+    are memoized per raw name. Scoring keywords are subsets of the categorization
+    keywords, so the scoring patterns only run on names that matched a category.
+    
+    Args:
+        name: Label name as returned by Rekognition
+        
+    Returns:
+        Tuple of (category, score kind)
+    """
+    name_lc = name.lower()
+    
+    if POSITIVE_PATTERN.search(name_lc):
+        if SCORE_POSITIVE_PATTERN.search(name_lc):
+            return CATEGORY_POSITIVE, KIND_POSITIVE
+        if SCORE_NEGATIVE_PATTERN.search(name_lc):
+            return CATEGORY_POSITIVE, KIND_NEGATIVE
+        return CATEGORY_POSITIVE, KIND_NEUTRAL
+    
+    if BARRIER_PATTERN.search(name_lc):
+        kind = KIND_NEGATIVE if SCORE_NEGATIVE_PATTERN.search(name_lc) else KIND_NEUTRAL
+        return CATEGORY_BARRIER, kind
+    
+    return CATEGORY_NONE, KIND_NEUTRAL
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -38,72 +141,100 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Dict containing final assessment with score, analyzed images, and recommendations
     """
     try:
-        # Log the incoming event for debugging
-        logger.info(f"Orchestrator processing event: {json.dumps(event)}")
+        # Log the incoming event for debugging (skip serializing it when INFO is off)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Orchestrator processing event: {json.dumps(event)}")
         
         # Extract images from event
         images = event.get('images', [])
         
         if not images:
             logger.error("No images provided in event")
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'No images provided'})
-            }
+            return build_response(400, {'error': 'No images provided'}, event)
         
         logger.info(f"Processing {len(images)} images")
         
         # Step 1: Process all images with Rekognition Lambda asynchronously
         rekognition_results = process_images_with_rekognition(images)
         
-        # Step 2: Combine all labels from multiple images
-        combined_labels = combine_labels_from_images(rekognition_results)
+        # Step 2: Combine, categorize and score all labels in a single pass
+        summary = summarize(rekognition_results)
         
         # Step 3: Invoke LLM Lambda with combined data
-        llm_results = invoke_llm_lambda(combined_labels, len(images))
+        llm_results = invoke_llm_lambda(summary.labels, len(images))
         
         # Step 4: Generate final assessment
         final_assessment = generate_final_assessment(
-            combined_labels, 
+            summary.labels, 
             llm_results, 
-            len(images)
+            len(images),
+            summary=summary
         )
         
         logger.info(f"Orchestrator completed successfully. Analyzed {len(images)} images")
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps(final_assessment)
-        }
+        return build_response(200, final_assessment, event)
         
     except Exception as e:
         logger.error(f"Orchestrator error: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'error': 'Orchestrator failed',
-                'message': str(e)
-            })
-        }
+        return build_response(500, {
+            'error': 'Orchestrator failed',
+            'message': str(e)
+        }, event)
+
+def build_response(status_code: int, payload: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the handler response for the caller.
+    
+    Args:
+        status_code: HTTP status code
+        payload: Response payload
+        event: Incoming Lambda event, used to detect API Gateway invocations
+        
+    Returns:
+        The payload itself for a successful assessment when ORCH_RAW_RETURN is set,
+        otherwise a statusCode/body envelope (with a JSON content type header
+        behind API Gateway)
+    """
+    # Errors keep the envelope so direct callers can tell them from an assessment
+    if ORCH_RAW_RETURN and status_code == 200:
+        return payload
+    
+    response = {
+        'statusCode': status_code,
+        'body': orjson.dumps(payload).decode()
+    }
+    if 'requestContext' in event:
+        response['headers'] = {'Content-Type': 'application/json'}
+    return response
 
 def process_images_with_rekognition(images: List[Dict[str, str]]) -> List[Dict[str, Any]]:
     """
-    Process all images with Rekognition Lambda asynchronously.
+    Process all images with Rekognition concurrently.
+    
+    Labels are detected in-process when REKOGNITION_INLINE is set; otherwise each
+    image is sent to the Rekognition Lambda.
     
     Args:
         images: List of image objects with bucket and key
         
     Returns:
-        List of Rekognition results for each image
+        List of successful Rekognition results ({"ok": True, "labels": [...], "key": ...})
     """
+    if not REKOGNITION_INLINE and RESULTS_QUEUE_PREFIX:
+        return process_images_via_queue(images)
+    
+    analyze_image = detect_image_labels if REKOGNITION_INLINE else invoke_rekognition_lambda
+    
     rekognition_results = []
     errors = []
     
     # Use ThreadPoolExecutor for concurrent processing
-    with ThreadPoolExecutor(max_workers=10) as executor:
+    max_workers = max(1, min(REKOGNITION_CONCURRENCY, len(images)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit all Rekognition tasks
         future_to_image = {
-            executor.submit(invoke_rekognition_lambda, image): image 
+            executor.submit(analyze_image, image): image 
             for image in images
         }
         
@@ -112,11 +243,11 @@ def process_images_with_rekognition(images: List[Dict[str, str]]) -> List[Dict[s
             image = future_to_image[future]
             try:
                 result = future.result()
-                if result.get('statusCode') == 200:
+                if result['ok']:
                     rekognition_results.append(result)
                     logger.info(f"Successfully processed image: {image.get('key')}")
                 else:
-                    error_msg = result.get('body', {}).get('error', 'Unknown error')
+                    error_msg = result.get('error', 'Unknown error')
                     errors.append(f"Image {image.get('key')}: {error_msg}")
                     logger.error(f"Rekognition failed for {image.get('key')}: {error_msg}")
             except Exception as e:
@@ -132,6 +263,170 @@ def process_images_with_rekognition(images: List[Dict[str, str]]) -> List[Dict[s
     
     return rekognition_results
 
+def process_images_via_queue(images: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Fire-and-forget Rekognition invocations and gather their results from SQS.
+    
+    The orchestrator does not hold a connection open per image; each Rekognition
+    Lambda publishes its result to a reply queue that only this run reads, so
+    concurrent runs never receive each other's messages. The queue is deleted
+    once the results are in or the wait expires.
+    
+    Args:
+        images: List of image objects with bucket and key
+        
+    Returns:
+        List of successful Rekognition results ({"ok": True, "labels": [...], "key": ...})
+    """
+    sqs_client = ConnectionPool.get_client('sqs')
+    job_id = uuid.uuid4().hex
+    
+    # Visibility outlasts the wait, so a received message cannot reappear before it is deleted
+    queue_url = sqs_client.create_queue(
+        QueueName=f"{RESULTS_QUEUE_PREFIX}-{job_id}",
+        Attributes={
+            'MessageRetentionPeriod': '300',
+            'VisibilityTimeout': str(RESULTS_WAIT_SECONDS + 30)
+        }
+    )['QueueUrl']
+    
+    try:
+        return _collect_queue_results(sqs_client, queue_url, job_id, images)
+    finally:
+        try:
+            sqs_client.delete_queue(QueueUrl=queue_url)
+        except Exception as e:
+            logger.warning(f"Could not delete reply queue {queue_url}: {str(e)}")
+
+def _collect_queue_results(
+    sqs_client,
+    queue_url: str,
+    job_id: str,
+    images: List[Dict[str, str]]
+) -> List[Dict[str, Any]]:
+    """
+    Invoke the Rekognition Lambda asynchronously per image and read the replies.
+    
+    Args:
+        sqs_client: Boto3 SQS client
+        queue_url: This run's reply queue
+        job_id: Identifier of this orchestrator run
+        images: List of image objects with bucket and key
+        
+    Returns:
+        List of successful Rekognition results
+    """
+    pending = {image.get('key') for image in images}
+    rekognition_results = []
+    errors = []
+    
+    cache_keys = {}
+    
+    def submit(image: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        cache_key, cached = get_cached_rekognition_result(image)
+        if cached is not None:
+            return cached
+        cache_keys[image.get('key')] = cache_key
+        
+        lambda_client.invoke(
+            FunctionName=REKOGNITION_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=orjson.dumps({
+                'bucket': image['bucket'],
+                'key': image['key'],
+                'job_id': job_id,
+                'reply_queue_url': queue_url,
+                'raw_result': True
+            })
+        )
+    
+    max_workers = max(1, min(REKOGNITION_CONCURRENCY, len(images)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_image = {executor.submit(submit, image): image for image in images}
+        for future in as_completed(future_to_image):
+            image = future_to_image[future]
+            try:
+                cached = future.result()
+                if cached is not None:
+                    pending.discard(image.get('key'))
+                    rekognition_results.append(cached)
+            except Exception as e:
+                pending.discard(image.get('key'))
+                error_msg = f"Exception invoking Rekognition for {image.get('key')}: {str(e)}"
+                errors.append(error_msg)
+                logger.error(error_msg)
+    
+    deadline = time.time() + RESULTS_WAIT_SECONDS
+    while pending and time.time() < deadline:
+        response = sqs_client.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=max(1, min(20, int(deadline - time.time()))),
+            MessageAttributeNames=['job_id', 'image_key']
+        )
+        
+        messages = response.get('Messages', [])
+        if messages:
+            # Delete on receipt; a retried Rekognition invocation may still add a duplicate,
+            # which the pending check below ignores
+            sqs_client.delete_message_batch(
+                QueueUrl=queue_url,
+                Entries=[{'Id': message['MessageId'], 'ReceiptHandle': message['ReceiptHandle']} for message in messages]
+            )
+        
+        for message in messages:
+            attributes = message.get('MessageAttributes', {})
+            image_key = attributes.get('image_key', {}).get('StringValue')
+            if image_key not in pending:
+                continue
+            pending.discard(image_key)
+            
+            result = normalize_rekognition_result(orjson.loads(message['Body']))
+            if result['ok']:
+                store_rekognition_result(cache_keys.get(image_key), result)
+                rekognition_results.append(result)
+                logger.info(f"Successfully processed image: {image_key}")
+            else:
+                error_msg = result.get('error', 'Unknown error')
+                errors.append(f"Image {image_key}: {error_msg}")
+                logger.error(f"Rekognition failed for {image_key}: {error_msg}")
+    
+    for image_key in pending:
+        errors.append(f"Image {image_key}: timed out waiting for Rekognition result")
+    
+    # Log any errors that occurred
+    if errors:
+        logger.warning(f"Encountered {len(errors)} errors during Rekognition processing")
+        for error in errors:
+            logger.warning(error)
+    
+    return rekognition_results
+
+def detect_image_labels(image: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Detect accessibility labels for a single image without leaving this function.
+    
+    Args:
+        image: Image object with bucket and key
+        
+    Returns:
+        Rekognition result in the same shape as invoke_rekognition_lambda
+    """
+    try:
+        cache_key, cached = get_cached_rekognition_result(image)
+        if cached is not None:
+            return cached
+        
+        labels = detect_labels_for_image(rekognition_client, image['bucket'], image['key'])
+        result = {'ok': True, 'labels': labels, 'key': image['key']}
+        store_rekognition_result(cache_key, result)
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Rekognition failed for {image.get('key')}: {str(e)}")
+        return {'ok': False, 'error': f'Rekognition detection failed: {str(e)}'}
+
 def invoke_rekognition_lambda(image: Dict[str, str]) -> Dict[str, Any]:
     """
     Invoke the Rekognition Lambda function for a single image.
@@ -140,33 +435,122 @@ def invoke_rekognition_lambda(image: Dict[str, str]) -> Dict[str, Any]:
         image: Image object with bucket and key
         
     Returns:
-        Rekognition Lambda response
+        Normalized Rekognition result (see normalize_rekognition_result)
     """
     try:
+        cache_key, cached = get_cached_rekognition_result(image)
+        if cached is not None:
+            return cached
+        
         # Prepare payload for Rekognition Lambda
         payload = {
             'bucket': image['bucket'],
-            'key': image['key']
+            'key': image['key'],
+            'raw_result': True
         }
         
         # Invoke Rekognition Lambda
         response = lambda_client.invoke(
-            FunctionName='rekognition-handler',  # Update with actual function name
+            FunctionName=REKOGNITION_FUNCTION_NAME,
             InvocationType='RequestResponse',
-            Payload=json.dumps(payload)
+            Payload=orjson.dumps(payload)
         )
         
         # Parse response
-        response_payload = json.loads(response['Payload'].read())
+        result = normalize_rekognition_result(orjson.loads(response['Payload'].read()))
         
-        return response_payload
+        if result['ok']:
+            store_rekognition_result(cache_key, result)
+        
+        return result
         
     except Exception as e:
         logger.error(f"Failed to invoke Rekognition Lambda for {image.get('key')}: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': f'Rekognition invocation failed: {str(e)}'})
-        }
+        return {'ok': False, 'error': f'Rekognition invocation failed: {str(e)}'}
+
+def get_cached_rekognition_result(image: Dict[str, str]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Look up a cached Rekognition result for an image by its S3 ETag.
+    
+    Args:
+        image: Image object with bucket and key
+        
+    Returns:
+        Tuple of (cache_key, result). cache_key is None when caching is disabled or
+        the object could not be inspected; result is None on a cache miss.
+    """
+    if rekognition_cache is None:
+        return None, None
+    
+    try:
+        head = s3_client.head_object(Bucket=image['bucket'], Key=image['key'])
+    except Exception as e:
+        logger.warning(f"Could not read ETag for {image.get('key')}, skipping cache: {str(e)}")
+        return None, None
+    
+    etag = head['ETag'].strip('"')
+    cache_key = f"etag:{etag}"
+    cached_body = rekognition_cache.get_cached_analysis(cache_key, analysis_type='rekognition')
+    if cached_body is None:
+        return cache_key, None
+    
+    # The cached labels may come from another key with identical content
+    return cache_key, {'ok': True, 'labels': cached_body.get('labels', []), 'key': image['key']}
+
+def store_rekognition_result(cache_key: Optional[str], result: Dict[str, Any]) -> None:
+    """
+    Cache the labels of a successful Rekognition result under its ETag key.
+    
+    Args:
+        cache_key: Key from get_cached_rekognition_result, or None to skip caching
+        result: Successful normalized Rekognition result
+    """
+    if rekognition_cache is None or cache_key is None:
+        return
+    
+    rekognition_cache.cache_analysis(
+        cache_key,
+        {'labels': result['labels']},
+        analysis_type='rekognition'
+    )
+
+def _result_body(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the decoded body of a Lambda result.
+    
+    Args:
+        result: Lambda response with a body that is either a JSON string or an inline object
+        
+    Returns:
+        Decoded body
+    """
+    body = result.get('body')
+    if body is None:
+        return {}
+    if isinstance(body, dict):
+        return body
+    return orjson.loads(body)
+
+def normalize_rekognition_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a Rekognition Lambda response into the raw result shape.
+    
+    Handlers invoked with "raw_result" already return this shape; statusCode/body
+    envelopes from older handler versions are unwrapped.
+    
+    Args:
+        result: Rekognition Lambda response
+        
+    Returns:
+        {"ok": True, "labels": [...], "key": ...} or {"ok": False, "error": ...}
+    """
+    if 'ok' in result:
+        return result
+    
+    body = _result_body(result)
+    if result.get('statusCode') == 200:
+        return {'ok': True, 'labels': body.get('labels', []), 'key': body.get('image_key')}
+    return {'ok': False, 'error': body.get('error', 'Unknown error')}
 
 def combine_labels_from_images(rekognition_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -178,18 +562,13 @@ def combine_labels_from_images(rekognition_results: List[Dict[str, Any]]) -> Lis
     Returns:
         Combined list of all labels from all images
     """
-    combined_labels = []
-    image_count = 0
+    successful = [
+        result for result in map(normalize_rekognition_result, rekognition_results)
+        if result['ok']
+    ]
+    combined_labels = list(chain.from_iterable(result['labels'] for result in successful))
     
-    for result in rekognition_results:
-        if result.get('statusCode') == 200:
-            body = json.loads(result.get('body', '{}'))
-            labels = body.get('labels', [])
-            combined_labels.extend(labels)
-            image_count += 1
-            logger.info(f"Added {len(labels)} labels from image")
-    
-    logger.info(f"Combined {len(combined_labels)} labels from {image_count} images")
+    logger.info(f"Combined {len(combined_labels)} labels from {len(successful)} images")
     return combined_labels
 
 def invoke_llm_lambda(combined_labels: List[Dict[str, Any]], image_count: int) -> Dict[str, Any]:
@@ -220,11 +599,11 @@ def invoke_llm_lambda(combined_labels: List[Dict[str, Any]], image_count: int) -
         response = lambda_client.invoke(
             FunctionName='llm-handler',  # Update with actual function name
             InvocationType='RequestResponse',
-            Payload=json.dumps(payload)
+            Payload=orjson.dumps(payload)
         )
         
         # Parse response
-        response_payload = json.loads(response['Payload'].read())
+        response_payload = orjson.loads(response['Payload'].read())
         
         return response_payload
         
@@ -238,7 +617,8 @@ def invoke_llm_lambda(combined_labels: List[Dict[str, Any]], image_count: int) -
 def generate_final_assessment(
     combined_labels: List[Dict[str, Any]], 
     llm_results: Dict[str, Any], 
-    image_count: int
+    image_count: int,
+    summary: Optional['LabelSummary'] = None
 ) -> Dict[str, Any]:
     """
     Generate the final accessibility assessment.
@@ -247,6 +627,7 @@ def generate_final_assessment(
         combined_labels: Combined labels from all images
         llm_results: Results from LLM Lambda
         image_count: Number of images analyzed
+        summary: Precomputed label summary; computed from combined_labels if omitted
         
     Returns:
         Final assessment with score, features, barriers, and recommendations
@@ -255,13 +636,14 @@ def generate_final_assessment(
         # Extract LLM results
         llm_body = {}
         if llm_results.get('statusCode') == 200:
-            llm_body = json.loads(llm_results.get('body', '{}'))
-        
-        # Calculate accessibility score based on labels
-        score = calculate_accessibility_score(combined_labels)
+            llm_body = _result_body(llm_results)
         
-        # Categorize labels into positive features and barriers
-        positive_features, barriers = categorize_labels(combined_labels)
+        # Score and categorize labels
+        if summary is None:
+            summary = summarize_labels(combined_labels)
+        score = summary.score
+        positive_features = summary.positive_features
+        barriers = summary.barriers
         
         # Extract recommendations from LLM results
         recommendations = llm_body.get('recommendations', [])
@@ -275,7 +657,7 @@ def generate_final_assessment(
             'positive_features': positive_features,
             'barriers': barriers,
             'recommendations': recommendations,
-            'total_labels': len(combined_labels),
+            'total_labels': summary.total_labels,
             'analysis_timestamp': context.aws_request_id if 'context' in globals() else None
         }
         
@@ -293,6 +675,128 @@ def generate_final_assessment(
             'error': str(e)
         }
 
+@dataclass
+class LabelBatch:
+    """
+    Column-oriented view of labels: confidence weights (0-1), categories and
+    score kinds.
+    """
+    weights: array = field(default_factory=lambda: array('d'))
+    categories: bytearray = field(default_factory=bytearray)
+    kinds: bytearray = field(default_factory=bytearray)
+    
+    def __len__(self) -> int:
+        return len(self.weights)
+    
+    def extend(self, labels: List[Dict[str, Any]]) -> None:
+        """Append the columns for labels, reading each dict once."""
+        for label in labels:
+            category, kind = _classify_label_name(label.get('name', ''))
+            self.weights.append(label.get('confidence', 0) / 100.0)
+            self.categories.append(category)
+            self.kinds.append(kind)
+    
+    def reduce_weights(self, start: int = 0) -> tuple[float, float]:
+        """
+        Sum the weights of positive and negative labels from index start onwards.
+        
+        Args:
+            start: First label index to include
+            
+        Returns:
+            Tuple of (positive_weight, negative_weight)
+        """
+        weights = self.weights[start:]
+        kinds = self.kinds[start:]
+        positive = sum(compress(weights, [kind == KIND_POSITIVE for kind in kinds]))
+        negative = sum(compress(weights, [kind == KIND_NEGATIVE for kind in kinds]))
+        return positive, negative
+
+@dataclass
+class LabelSummary:
+    """Combined labels with their categorization and score inputs."""
+    labels: List[Dict[str, Any]] = field(default_factory=list)
+    columns: LabelBatch = field(default_factory=LabelBatch)
+    positive_features: List[Dict[str, Any]] = field(default_factory=list)
+    barriers: List[Dict[str, Any]] = field(default_factory=list)
+    positive_weight: float = 0.0
+    negative_weight: float = 0.0
+    image_count: int = 0
+    
+    @property
+    def total_labels(self) -> int:
+        return len(self.labels)
+    
+    @property
+    def score(self) -> int:
+        """Accessibility score (0-100), neutral when no weighted features were found."""
+        total_weight = self.positive_weight + self.negative_weight
+        if total_weight == 0:
+            return 50
+        score = int((self.positive_weight / total_weight) * 100)
+        return max(0, min(100, score))
+
+def _accumulate_labels(summary: LabelSummary, labels: List[Dict[str, Any]]) -> None:
+    """
+    Categorize and weight labels into an existing summary.
+    
+    Names and weights are pulled into columns once with memoized classification,
+    then features and weights are selected per column with C-level builtins.
+    
+    Args:
+        summary: Summary to update in place
+        labels: Labels to add
+    """
+    columns = summary.columns
+    start = len(columns)
+    columns.extend(labels)
+    summary.labels.extend(labels)
+    
+    categories = columns.categories[start:]
+    summary.positive_features.extend(
+        compress(labels, [category == CATEGORY_POSITIVE for category in categories])
+    )
+    summary.barriers.extend(
+        compress(labels, [category == CATEGORY_BARRIER for category in categories])
+    )
+    
+    positive_weight, negative_weight = columns.reduce_weights(start)
+    summary.positive_weight += positive_weight
+    summary.negative_weight += negative_weight
+
+def summarize(rekognition_results: List[Dict[str, Any]]) -> LabelSummary:
+    """
+    Combine, categorize and score labels from Rekognition results in one pass.
+    
+    Args:
+        rekognition_results: Successful results from process_images_with_rekognition
+        
+    Returns:
+        LabelSummary for the results
+    """
+    summary = LabelSummary()
+    
+    for result in rekognition_results:
+        _accumulate_labels(summary, result['labels'])
+        summary.image_count += 1
+    
+    logger.info(f"Combined {summary.total_labels} labels from {summary.image_count} images")
+    return summary
+
+def summarize_labels(labels: List[Dict[str, Any]]) -> LabelSummary:
+    """
+    Categorize and score an already combined list of labels.
+    
+    Args:
+        labels: List of detected labels
+        
+    Returns:
+        LabelSummary for the labels
+    """
+    summary = LabelSummary()
+    _accumulate_labels(summary, labels)
+    return summary
+
 def calculate_accessibility_score(labels: List[Dict[str, Any]]) -> int:
     """
     Calculate accessibility score based on detected labels.
@@ -306,31 +810,7 @@ def calculate_accessibility_score(labels: List[Dict[str, Any]]) -> int:
     if not labels:
         return 50  # Neutral score for no data
     
-    # Define positive and negative features
-    positive_features = {'ramp', 'elevator', 'lift', 'handrail', 'grab bar', 'accessible'}
-    negative_features = {'stairs', 'step', 'threshold', 'narrow', 'obstacle'}
-    
-    positive_count = 0
-    negative_count = 0
-    
-    for label in labels:
-        label_name = label.get('name', '').lower()
-        confidence = label.get('confidence', 0)
-        
-        # Weight by confidence
-        weight = confidence / 100.0
-        
-        if any(feature in label_name for feature in positive_features):
-            positive_count += weight
-        elif any(feature in label_name for feature in negative_features):
-            negative_count += weight
-    
-    # Calculate score (0-100)
-    if positive_count + negative_count == 0:
-        return 50
-    
-    score = int((positive_count / (positive_count + negative_count)) * 100)
-    return max(0, min(100, score))
+    return summarize_labels(labels).score
 
 def categorize_labels(labels: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
@@ -342,21 +822,8 @@ def categorize_labels(labels: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]
     Returns:
         Tuple of (positive_features, barriers)
     """
-    positive_features = []
-    barriers = []
-    
-    positive_keywords = {'ramp', 'elevator', 'lift', 'handrail', 'grab bar', 'accessible', 'wide'}
-    barrier_keywords = {'stairs', 'step', 'threshold', 'narrow', 'obstacle', 'clutter'}
-    
-    for label in labels:
-        label_name = label.get('name', '').lower()
-        
-        if any(keyword in label_name for keyword in positive_keywords):
-            positive_features.append(label)
-        elif any(keyword in label_name for keyword in barrier_keywords):
-            barriers.append(label)
-    
-    return positive_features, barriers
+    summary = summarize_labels(labels)
+    return summary.positive_features, summary.barriers
 
 def generate_fallback_recommendations(
     positive_features: List[Dict[str, Any]], 
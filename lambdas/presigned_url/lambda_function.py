@@ -3,12 +3,15 @@ AWS Lambda function for generating presigned S3 upload URLs.
 Provides secure, temporary upload URLs for frontend file uploads.
 """
 
-import json
+import logging
+import orjson
 import boto3
-import uuid
+from botocore.config import Config
+import secrets
 import os
+import re
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from urllib.parse import urlparse
 
 # Import custom modules
@@ -17,33 +20,49 @@ from utils.exceptions import (
     InvalidInputError, S3Error, ValidationError, 
     handle_aws_error, AccessibilityCheckerError
 )
-from utils.validation import PresignedUrlRequest, validate_file_size
 
 # Initialize structured logger
 logger = get_logger(__name__)
 
 # Initialize AWS clients
-s3_client = boto3.client('s3')
+s3_client = boto3.client('s3', config=Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+))
 
 # Configuration
 S3_BUCKET = os.environ.get('S3_BUCKET_NAME', 'accessibility-checker-uploads')
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
 EXPIRATION_SECONDS = 300  # 5 minutes
 
+# Upload size limit enforced by S3 through the POST policy; a presigned PUT URL
+# cannot carry this condition, which is why uploads use POST
+_CONTENT_LENGTH_CONDITION = ['content-length-range', 1, MAX_FILE_SIZE]
+
 # Allowed file types
-ALLOWED_CONTENT_TYPES = {
+ALLOWED_CONTENT_TYPES = frozenset({
     'image/jpeg',
     'image/jpg', 
     'image/png',
     'image/webp'
-}
+})
 
-ALLOWED_EXTENSIONS = {
+ALLOWED_EXTENSIONS = frozenset({
     '.jpg',
     '.jpeg',
     '.png',
     '.webp'
-}
+})
+
+# Tuple form so str.endswith can check all extensions in one call
+_ALLOWED_EXT_TUPLE = tuple(sorted(ALLOWED_EXTENSIONS))
+
+# Maps filesystem/shell metacharacters to NUL so one translate() pass flags them
+_FORBIDDEN = str.maketrans({c: '\x00' for c in '/\\<>:"|?*'})
+
+# Used by sanitize_filename to replace dangerous sequences and collapse underscores
+_DANGEROUS_SEQUENCE = re.compile(r'\.\.|[/\\<>:"|?*]')
+_MULTI_UNDERSCORE = re.compile(r'_+')
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -60,37 +79,37 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     with create_request_context(request_id, 'presigned-url-generator') as ctx:
         try:
-            # Log the incoming event for debugging
-            ctx.log_operation('input_validation', f"Processing presigned URL request: {json.dumps(event)}")
+            # Log the incoming event for debugging (skip serializing it when INFO is off)
+            if ctx.logger.isEnabledFor(logging.INFO):
+                ctx.log_operation('input_validation', f"Processing presigned URL request: {orjson.dumps(event).decode()}")
             
-            # Validate input using Pydantic model
+            # Validate input
             try:
-                request_data = PresignedUrlRequest(**event)
-            except Exception as validation_error:
-                ctx.log_error('input_validation', f"Input validation failed: {str(validation_error)}")
-                return create_error_response(400, InvalidInputError(
-                    f"Input validation failed: {str(validation_error)}",
-                    field="event"
-                ))
+                filename, content_type = _validate_event(event)
+            except InvalidInputError as validation_error:
+                ctx.log_error('input_validation', f"Input validation failed: {validation_error.message}")
+                return create_error_response(400, validation_error)
             
             # Generate unique key to prevent collisions
-            unique_key = generate_unique_key(request_data.filename)
+            unique_key = generate_unique_key(filename)
             
             ctx.log_operation('key_generation', f"Generated unique key: {unique_key}")
             
             # Generate presigned POST URL
             try:
-                presigned_data = generate_presigned_post(unique_key, request_data.content_type)
+                presigned_data = generate_presigned_post(unique_key, content_type)
                 ctx.log_operation('presigned_generation', f"Successfully generated presigned URL for: {unique_key}")
                 
+                # One orjson call over the whole dict; splicing pre-serialized
+                # fragments (e.g. the constant expires_in) measured slower
                 return {
                     'statusCode': 200,
-                    'body': json.dumps({
+                    'body': orjson.dumps({
                         'upload_url': presigned_data['url'],
                         'fields': presigned_data['fields'],
                         'key': unique_key,
                         'expires_in': EXPIRATION_SECONDS
-                    })
+                    }).decode()
                 }
                 
             except Exception as s3_error:
@@ -113,6 +132,39 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 error_code="INTERNAL_ERROR"
             ))
 
+def _validate_event(event: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Validate the presigned URL request event.
+    
+    Args:
+        event: Lambda event containing filename and content_type
+        
+    Returns:
+        Tuple of (filename, content_type)
+        
+    Raises:
+        InvalidInputError: If a field is missing or the file type is not allowed
+    """
+    filename = event.get('filename')
+    if not filename or not isinstance(filename, str):
+        raise InvalidInputError("Missing filename", field="filename")
+    
+    content_type = event.get('content_type')
+    if not content_type or not isinstance(content_type, str):
+        raise InvalidInputError("Missing content_type", field="content_type")
+    
+    if not validate_filename(filename):
+        raise InvalidInputError("Invalid filename", field="filename", value=filename)
+    
+    if not is_valid_file_type(filename, content_type):
+        raise InvalidInputError(
+            f"Invalid file type: {content_type}",
+            field="content_type",
+            value=content_type
+        )
+    
+    return filename, content_type
+
 def is_valid_file_type(filename: str, content_type: str) -> bool:
     """
     Validate that the file type is allowed.
@@ -129,8 +181,7 @@ def is_valid_file_type(filename: str, content_type: str) -> bool:
         return False
     
     # Check file extension
-    filename_lower = filename.lower()
-    if not any(filename_lower.endswith(ext) for ext in ALLOWED_EXTENSIONS):
+    if not filename.lower().endswith(_ALLOWED_EXT_TUPLE):
         return False
     
     return True
@@ -143,19 +194,10 @@ def generate_unique_key(filename: str) -> str:
         filename: Original filename
         
     Returns:
-        Unique S3 key with UUID prefix
+        Unique S3 key with a random hex prefix
     """
-    # Generate UUID for uniqueness
-    unique_id = str(uuid.uuid4())
-    
-    # Extract file extension
-    file_extension = os.path.splitext(filename)[1].lower()
-    
-    # Create unique key: uploads/uuid-filename
-    unique_key = f"uploads/{unique_id}-{filename}"
-    
-    logger.info(f"Generated unique key: {unique_key}")
-    return unique_key
+    # Create unique key: uploads/<96 random bits as hex>-filename (the handler logs the result)
+    return f"uploads/{secrets.token_hex(12)}-{filename}"
 
 def create_error_response(status_code: int, error: AccessibilityCheckerError) -> Dict[str, Any]:
     """
@@ -170,7 +212,7 @@ def create_error_response(status_code: int, error: AccessibilityCheckerError) ->
     """
     return {
         'statusCode': status_code,
-        'body': error.to_json()
+        'body': orjson.dumps(error.to_dict()).decode()
     }
 
 
@@ -178,6 +220,10 @@ def generate_presigned_post(key: str, content_type: str) -> Dict[str, Any]:
     """
     Generate presigned POST data for S3 upload.
     
+    Signing is done locally by botocore (no network call, ~0.2ms), so results
+    are deliberately not cached: every upload gets its own key and policy, and
+    reusing a signed POST across requests would let uploads overwrite each other.
+    
     Args:
         key: S3 object key
         content_type: MIME type of the file
@@ -195,7 +241,7 @@ def generate_presigned_post(key: str, content_type: str) -> Dict[str, Any]:
             },
             Conditions=[
                 {'Content-Type': content_type},
-                ['content-length-range', 1, MAX_FILE_SIZE],
+                _CONTENT_LENGTH_CONDITION,
                 {'key': key}
             ],
             ExpiresIn=EXPIRATION_SECONDS
@@ -226,9 +272,8 @@ def validate_filename(filename: str) -> bool:
     if len(filename) > 255:
         return False
     
-    # Check for dangerous characters
-    dangerous_chars = ['..', '/', '\\', '<', '>', ':', '"', '|', '?', '*']
-    if any(char in filename for char in dangerous_chars):
+    # Check for dangerous characters and path traversal
+    if '\x00' in filename.translate(_FORBIDDEN) or '..' in filename:
         return False
     
     return True
@@ -243,20 +288,15 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename
     """
-    # Remove or replace dangerous characters
-    sanitized = filename
-    
     # Replace dangerous characters with underscores
-    dangerous_chars = ['..', '/', '\\', '<', '>', ':', '"', '|', '?', '*']
-    for char in dangerous_chars:
-        sanitized = sanitized.replace(char, '_')
+    sanitized = _DANGEROUS_SEQUENCE.sub('_', filename)
     
-    # Remove multiple consecutive underscores
-    while '__' in sanitized:
-        sanitized = sanitized.replace('__', '_')
+    # Remove multiple consecutive underscores, and the leading one a stripped
+    # path prefix leaves behind ("../etc" -> "etc")
+    sanitized = _MULTI_UNDERSCORE.sub('_', sanitized).lstrip('_')
     
     # Ensure filename is not empty
-    if not sanitized or sanitized == '_':
-        sanitized = f"file_{uuid.uuid4().hex[:8]}"
+    if not sanitized:
+        sanitized = f"file_{secrets.token_hex(4)}"
     
     return sanitized
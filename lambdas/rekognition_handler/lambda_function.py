@@ -3,19 +3,31 @@ AWS Lambda handler for processing images with Amazon Rekognition
 to detect accessibility-relevant labels in home environments.
 """
 
-import json
+import orjson
 import boto3
 import logging
 from typing import Dict, Any, List
 
+from utils.accessibility_labels import detect_labels_for_image, filter_accessibility_labels
+
 # Configure CloudWatch logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Initialize AWS clients once per container so warm invocations reuse them
+rekognition = boto3.client('rekognition')
+sqs = boto3.client('sqs')
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler for detecting accessibility-relevant labels in images.
     
+    Callers other than the orchestrator receive an HTTP-style response. The
+    orchestrator sets "raw_result" to get the result dict directly, without the
+    statusCode envelope or a JSON-encoded body. When the event carries a
+    "reply_queue_url" (asynchronous invocation), the response is also published
+    to that queue tagged with "job_id".
+    
     Args:
         event: Lambda event containing {"bucket": "bucket-name", "key": "image-key"}
         context: Lambda context object
@@ -23,9 +35,76 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
         Dict containing detected labels and image key
     """
+    result = detect_accessibility_labels(event)
+    response = result if event.get('raw_result') else to_http_response(result)
+    
+    if event.get('reply_queue_url'):
+        publish_result(event, response)
+    
+    return response
+
+def to_http_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap a raw detection result in a statusCode/body envelope.
+    
+    Args:
+        result: Result from detect_accessibility_labels
+        
+    Returns:
+        Dict with statusCode and JSON-encoded body
+    """
+    if result['ok']:
+        return {
+            'statusCode': 200,
+            'body': orjson.dumps({
+                'labels': result['labels'],
+                'image_key': result['key']
+            }).decode()
+        }
+    
+    body = {'error': result['error']}
+    if 'message' in result:
+        body['message'] = result['message']
+    return {
+        'statusCode': result.get('status', 500),
+        'body': orjson.dumps(body).decode()
+    }
+
+def publish_result(event: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """
+    Send a handler result to the orchestrator's results queue.
+    
+    Args:
+        event: Original Lambda event with "reply_queue_url" and "job_id"
+        result: Handler response to publish
+    """
     try:
-        # Log the incoming event for debugging
-        logger.info(f"Processing event: {json.dumps(event)}")
+        sqs.send_message(
+            QueueUrl=event['reply_queue_url'],
+            MessageBody=orjson.dumps(result).decode(),
+            MessageAttributes={
+                'job_id': {'DataType': 'String', 'StringValue': str(event.get('job_id', ''))},
+                'image_key': {'DataType': 'String', 'StringValue': str(event.get('key', ''))}
+            }
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish result for {event.get('key')}: {str(e)}", exc_info=True)
+
+def detect_accessibility_labels(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run Rekognition label detection for the image described by the event.
+    
+    Args:
+        event: Lambda event containing {"bucket": "bucket-name", "key": "image-key"}
+        
+    Returns:
+        {"ok": True, "labels": [...], "key": "..."} on success, or
+        {"ok": False, "status": 400|500, "error": "...", ["message": "..."]} on failure
+    """
+    try:
+        # Log the incoming event for debugging (skip serializing it when INFO is off)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Processing event: {orjson.dumps(event).decode()}")
         
         # Extract image data from event
         bucket_name = event.get('bucket')
@@ -34,86 +113,26 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Validate required parameters
         if not bucket_name:
             logger.error("Missing 'bucket' in event")
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Missing bucket in event'})
-            }
+            return {'ok': False, 'status': 400, 'error': 'Missing bucket in event'}
         
         if not image_key:
             logger.error("Missing 'key' in event")
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Missing key in event'})
-            }
+            return {'ok': False, 'status': 400, 'error': 'Missing key in event'}
         
         logger.info(f"Processing image: s3://{bucket_name}/{image_key}")
         
-        # Initialize Rekognition client
-        rekognition = boto3.client('rekognition')
-        
-        # Call Rekognition to detect labels
-        response = rekognition.detect_labels(
-            Image={'S3Object': {'Bucket': bucket_name, 'Name': image_key}},
-            MaxLabels=50,
-            MinConfidence=70
-        )
-        
-        logger.info(f"Rekognition detected {len(response.get('Labels', []))} labels")
-        
-        # Filter labels for accessibility-relevant ones
-        accessibility_labels = filter_accessibility_labels(response.get('Labels', []))
+        # Detect labels and keep the accessibility-relevant ones
+        accessibility_labels = detect_labels_for_image(rekognition, bucket_name, image_key)
         
         logger.info(f"Found {len(accessibility_labels)} accessibility-relevant labels")
         
-        # Return the filtered results
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'labels': accessibility_labels,
-                'image_key': image_key
-            })
-        }
+        return {'ok': True, 'labels': accessibility_labels, 'key': image_key}
         
     except Exception as e:
         logger.error(f"Error processing image: {str(e)}", exc_info=True)
         return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'error': 'Internal server error',
-                'message': str(e)
-            })
+            'ok': False,
+            'status': 500,
+            'error': 'Internal server error',
+            'message': str(e)
         }
-
-def filter_accessibility_labels(labels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Filter labels to only include accessibility-relevant ones.
-    
-    Args:
-        labels: List of labels from Rekognition
-        
-    Returns:
-        List of filtered accessibility-relevant labels
-    """
-    # Define accessibility-relevant keywords
-    accessibility_keywords = {
-        'stairs', 'ramp', 'door', 'doorway', 'bathroom', 'bedroom', 
-        'kitchen', 'hallway', 'entrance', 'elevator', 'lift', 
-        'wheelchair', 'grab bar', 'handrail', 'step', 'threshold'
-    }
-    
-    filtered_labels = []
-    
-    for label in labels:
-        label_name = label.get('Name', '').lower()
-        confidence = label.get('Confidence', 0)
-        
-        # Check if label name contains any accessibility keywords
-        if any(keyword in label_name for keyword in accessibility_keywords):
-            filtered_labels.append({
-                'name': label.get('Name'),
-                'confidence': round(confidence, 2),
-                'category': 'accessibility'
-            })
-            logger.info(f"Found accessibility label: {label.get('Name')} (confidence: {confidence:.2f}%)")
-    
-    return filtered_labels
@@ -25,15 +25,16 @@ def main():
     print("Extracting property details...")
     print("Extracting property images from page...")
     
-    # Generate mock images
-    mock_images = []
-    for i in range(1, min(args.max_images + 1, 11)):  # Generate up to 10 mock images
-        mock_images.append(f"https://photos.zillowstatic.com/fp/mock_image_{i:02d}-cc_ft_1536.webp")
+    # Generate mock images (up to 10)
+    mock_images = [
+        f"https://photos.zillowstatic.com/fp/mock_image_{i:02d}-cc_ft_1536.webp"
+        for i in range(1, min(args.max_images + 1, 11))
+    ]
     
     print(f"\nFound {len(mock_images)} image(s):")
     print("-" * 50)
-    for i, url in enumerate(mock_images, 1):
-        print(f" {i}. {url}")
+    if mock_images:
+        print("\n".join(f" {i}. {url}" for i, url in enumerate(mock_images, 1)))
     
     # Mock property details
     property_details = {
@@ -4,23 +4,41 @@ Local testing script for Accessibility Checker Lambda functions.
 Simulates Lambda events and tests functions locally with mocked AWS services.
 """
 
+import io
 import json
 import os
 import sys
 import boto3
-from moto import mock_s3, mock_rekognition, mock_bedrock
-from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from unittest.mock import patch
 import pytest
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
 # Import Lambda functions
+import lambdas.presigned_url.lambda_function as presigned_url_module
+import lambdas.rekognition_handler.lambda_function as rekognition_module
+import lambdas.llm_handler.lambda_function as llm_module
+import lambdas.orchestrator.lambda_function as orchestrator_module
 from lambdas.presigned_url.lambda_function import lambda_handler as presigned_url_handler
 from lambdas.rekognition_handler.lambda_function import lambda_handler as rekognition_handler
 from lambdas.llm_handler.lambda_function import lambda_handler as llm_handler
 from lambdas.orchestrator.lambda_function import lambda_handler as orchestrator_handler
 
+# One session per process; stubbed clients are created from it instead of
+# patching boto3.client in every test
+SESSION = boto3.session.Session(
+    aws_access_key_id='testing',
+    aws_secret_access_key='testing',
+    region_name=os.environ['AWS_DEFAULT_REGION']
+)
+
 class MockContext:
     """Mock Lambda context for testing."""
     def __init__(self):
@@ -38,24 +56,41 @@ def load_test_event(event_file):
     with open(f"tests/events/{event_file}", 'r') as f:
         return json.load(f)
 
-@mock_s3
+@contextmanager
+def stubbed(client):
+    """Stub a boto3 client and check every queued response was used."""
+    with Stubber(client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+def streaming_body(payload):
+    """Wrap a JSON payload the way botocore returns streaming blobs."""
+    data = json.dumps(payload).encode()
+    return StreamingBody(io.BytesIO(data), len(data))
+
+def bedrock_response(items):
+    """Build a Bedrock invoke_model response whose text is a JSON array."""
+    return {
+        'body': streaming_body({'content': [{'text': json.dumps(items)}]}),
+        'contentType': 'application/json'
+    }
+
 def test_presigned_url_generator():
-    """Test presigned URL generator with mocked S3."""
+    """Test presigned URL generator with a stubbed S3 client."""
     print("🧪 Testing Presigned URL Generator...")
     
     # Set up environment
     os.environ['S3_BUCKET_NAME'] = 'test-bucket'
     
-    # Create mock S3 bucket
-    s3_client = boto3.client('s3')
-    s3_client.create_bucket(Bucket='test-bucket')
-    
     # Load test event
     event = load_test_event('presigned_url_event.json')
     context = MockContext()
     
-    # Test the function
-    response = presigned_url_handler(event, context)
+    # Presigned POSTs are signed locally, so no S3 responses are queued; any
+    # real S3 call would fail the stub
+    s3_client = SESSION.client('s3')
+    with stubbed(s3_client), patch.object(presigned_url_module, 's3_client', s3_client):
+        response = presigned_url_handler(event, context)
     
     # Verify response
     assert response['statusCode'] == 200
@@ -68,21 +103,16 @@ def test_presigned_url_generator():
     print("✅ Presigned URL Generator test passed!")
     return response
 
-@mock_rekognition
 def test_rekognition_handler():
-    """Test Rekognition handler with mocked Rekognition service."""
+    """Test Rekognition handler with a stubbed Rekognition client."""
     print("🧪 Testing Rekognition Handler...")
     
-    # Set up environment
-    os.environ['AWS_REGION'] = 'us-east-1'
-    
-    # Create mock Rekognition client
-    rekognition_client = boto3.client('rekognition')
+    # Load test event
+    event = load_test_event('rekognition_event.json')
+    context = MockContext()
     
-    # Mock Rekognition response
-    with patch('boto3.client') as mock_client:
-        mock_rekognition = MagicMock()
-        mock_rekognition.detect_labels.return_value = {
+    with stubbed(rekognition_module.rekognition) as stubber:
+        stubber.add_response('detect_labels', {
             'Labels': [
                 {'Name': 'Stairs', 'Confidence': 95.5},
                 {'Name': 'Door', 'Confidence': 88.2},
@@ -90,181 +120,148 @@ def test_rekognition_handler():
                 {'Name': 'Kitchen', 'Confidence': 85.7},
                 {'Name': 'Furniture', 'Confidence': 78.3}
             ]
-        }
-        mock_client.return_value = mock_rekognition
-        
-        # Load test event
-        event = load_test_event('rekognition_event.json')
-        context = MockContext()
+        }, {
+            'Image': {'S3Object': {'Bucket': event['bucket'], 'Name': event['key']}},
+            'MaxLabels': 50,
+            'MinConfidence': 70,
+            'Features': ['GENERAL_LABELS']
+        })
         
         # Test the function
         response = rekognition_handler(event, context)
-        
-        # Verify response
-        assert response['statusCode'] == 200
-        body = json.loads(response['body'])
-        assert 'labels' in body
-        assert 'image_key' in body
-        assert len(body['labels']) > 0
-        
-        # Check that only accessibility-relevant labels are returned
-        label_names = [label['name'] for label in body['labels']]
-        assert 'Stairs' in label_names
-        assert 'Door' in label_names
-        assert 'Bathroom' in label_names
-        assert 'Kitchen' in label_names
-        assert 'Furniture' not in label_names  # Should be filtered out
-        
-        print("✅ Rekognition Handler test passed!")
-        return response
+    
+    # Verify response
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert 'labels' in body
+    assert 'image_key' in body
+    assert len(body['labels']) > 0
+    
+    # Check that only accessibility-relevant labels are returned
+    label_names = [label['name'] for label in body['labels']]
+    assert 'Stairs' in label_names
+    assert 'Door' in label_names
+    assert 'Bathroom' in label_names
+    assert 'Kitchen' in label_names
+    assert 'Furniture' not in label_names  # Should be filtered out
+    
+    print("✅ Rekognition Handler test passed!")
+    return response
 
-@mock_bedrock
 def test_llm_handler():
-    """Test LLM handler with mocked Bedrock service."""
+    """Test LLM handler with a stubbed Bedrock client."""
     print("🧪 Testing LLM Handler...")
     
     # Set up environment
     os.environ['BEDROCK_MODEL_ID'] = 'anthropic.claude-3-sonnet-20240229-v1:0'
     
-    # Mock Bedrock response
-    with patch('boto3.client') as mock_client:
-        mock_bedrock = MagicMock()
-        mock_bedrock.invoke_model.return_value = {
-            'body': json.dumps({
-                'content': [{
-                    'text': json.dumps([
-                        {
-                            'title': 'Install Grab Bars',
-                            'description': 'Add grab bars in the bathroom for safety',
-                            'priority': 'high',
-                            'category': 'safety',
-                            'estimated_cost': 'low'
-                        },
-                        {
-                            'title': 'Widen Doorways',
-                            'description': 'Consider widening doorways for wheelchair access',
-                            'priority': 'medium',
-                            'category': 'structural',
-                            'estimated_cost': 'high'
-                        }
-                    ])
-                }])
-            })
-        }
-        mock_client.return_value = mock_bedrock
-        
-        # Load test event
-        event = load_test_event('llm_event.json')
-        context = MockContext()
-        
-        # Test the function
-        response = llm_handler(event, context)
-        
-        # Verify response
-        assert response['statusCode'] == 200
-        body = json.loads(response['body'])
-        assert 'recommendations' in body
-        assert 'improvements' in body
-        assert len(body['recommendations']) > 0
+    # Load test event
+    event = load_test_event('llm_event.json')
+    context = MockContext()
+    
+    bedrock = SESSION.client('bedrock-runtime')
+    with stubbed(bedrock) as stubber:
+        # One response each for recommendations and improvements
+        stubber.add_response('invoke_model', bedrock_response([
+            {
+                'title': 'Install Grab Bars',
+                'description': 'Add grab bars in the bathroom for safety',
+                'priority': 'high',
+                'category': 'safety',
+                'estimated_cost': 'low'
+            },
+            {
+                'title': 'Widen Doorways',
+                'description': 'Consider widening doorways for wheelchair access',
+                'priority': 'medium',
+                'category': 'structural',
+                'estimated_cost': 'high'
+            }
+        ]))
+        stubber.add_response('invoke_model', bedrock_response([
+            {
+                'title': 'Add a Ramp',
+                'description': 'Replace entry steps with a ramp',
+                'implementation_difficulty': 'moderate',
+                'category': 'structural',
+                'estimated_impact': 'high'
+            }
+        ]))
         
-        print("✅ LLM Handler test passed!")
-        return response
+        # Test the function; Stubber cannot fake event streams, so use buffered responses.
+        # Stubber answers in queue order, so a single worker keeps the two calls in
+        # submission order (recommendations, then improvements)
+        with patch('utils.bedrock_client.boto3.client', return_value=bedrock), \
+                patch.object(llm_module, 'LLM_STREAMING', False), \
+                patch.object(llm_module, 'ThreadPoolExecutor', lambda max_workers: ThreadPoolExecutor(max_workers=1)):
+            response = llm_handler(event, context)
+    
+    # Verify response
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert 'recommendations' in body
+    assert 'improvements' in body
+    assert len(body['recommendations']) > 0
+    assert body['recommendations'][0]['title'] == 'Install Grab Bars'
+    assert body['improvements'][0]['title'] == 'Add a Ramp'
+    
+    print("✅ LLM Handler test passed!")
+    return response
 
-@mock_s3
-@mock_rekognition
-@mock_bedrock
 def test_orchestrator():
-    """Test orchestrator with mocked AWS services."""
+    """Test orchestrator with stubbed Rekognition and Lambda clients."""
     print("🧪 Testing Orchestrator...")
     
-    # Set up environment
-    os.environ['S3_BUCKET_NAME'] = 'test-bucket'
-    os.environ['AWS_REGION'] = 'us-east-1'
-    os.environ['BEDROCK_MODEL_ID'] = 'anthropic.claude-3-sonnet-20240229-v1:0'
-    
-    # Create mock S3 bucket
-    s3_client = boto3.client('s3')
-    s3_client.create_bucket(Bucket='test-bucket')
+    # Load test event
+    event = load_test_event('analyze_event.json')
+    context = MockContext()
     
-    # Mock Lambda client for cross-function invocation
-    with patch('boto3.client') as mock_client:
-        # Mock S3 client
-        mock_s3 = MagicMock()
-        mock_s3.create_bucket.return_value = {}
-        
-        # Mock Rekognition response
-        mock_rekognition = MagicMock()
-        mock_rekognition.detect_labels.return_value = {
-            'Labels': [
-                {'Name': 'Stairs', 'Confidence': 95.5},
-                {'Name': 'Door', 'Confidence': 88.2}
-            ]
-        }
+    with stubbed(orchestrator_module.rekognition_client) as rekognition_stubber, \
+            stubbed(orchestrator_module.lambda_client) as stubber:
+        # Labels are detected in-process, one detect_labels call per image
+        for _ in event['images']:
+            rekognition_stubber.add_response('detect_labels', {
+                'Labels': [
+                    {'Name': 'Stairs', 'Confidence': 95.5},
+                    {'Name': 'Door', 'Confidence': 88.2}
+                ]
+            })
         
-        # Mock Bedrock response
-        mock_bedrock = MagicMock()
-        mock_bedrock.invoke_model.return_value = {
-            'body': json.dumps({
-                'content': [{
-                    'text': json.dumps([
+        # LLM handler invocation
+        stubber.add_response('invoke', {
+            'StatusCode': 200,
+            'Payload': streaming_body({
+                'statusCode': 200,
+                'body': json.dumps({
+                    'success': True,
+                    'recommendations': [
                         {
                             'title': 'Test Recommendation',
                             'description': 'Test description',
                             'priority': 'high',
                             'category': 'safety'
                         }
-                    ])
-                }])
-            })
-        }
-        
-        # Mock Lambda client for orchestrator
-        mock_lambda = MagicMock()
-        mock_lambda.invoke.return_value = {
-            'Payload': json.dumps({
-                'statusCode': 200,
-                'body': json.dumps({
-                    'labels': [
-                        {'name': 'Stairs', 'confidence': 95.5, 'category': 'accessibility'},
-                        {'name': 'Door', 'confidence': 88.2, 'category': 'accessibility'}
-                    ]
+                    ],
+                    'improvements': []
                 })
             })
-        }
-        
-        # Configure mock client to return appropriate clients
-        def mock_client_side_effect(service_name, **kwargs):
-            if service_name == 's3':
-                return mock_s3
-            elif service_name == 'rekognition':
-                return mock_rekognition
-            elif service_name == 'bedrock-runtime':
-                return mock_bedrock
-            elif service_name == 'lambda':
-                return mock_lambda
-            return MagicMock()
-        
-        mock_client.side_effect = mock_client_side_effect
-        
-        # Load test event
-        event = load_test_event('analyze_event.json')
-        context = MockContext()
+        })
         
         # Test the function
         response = orchestrator_handler(event, context)
-        
-        # Verify response
-        assert response['statusCode'] == 200
-        body = json.loads(response['body'])
-        assert 'score' in body
-        assert 'analyzed_images' in body
-        assert 'positive_features' in body
-        assert 'barriers' in body
-        assert 'recommendations' in body
-        assert body['analyzed_images'] == 3
-        
-        print("✅ Orchestrator test passed!")
-        return response
+    
+    # Verify response
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert 'score' in body
+    assert 'analyzed_images' in body
+    assert 'positive_features' in body
+    assert 'barriers' in body
+    assert 'recommendations' in body
+    assert body['analyzed_images'] == 3
+    
+    print("✅ Orchestrator test passed!")
+    return response
 
 def run_all_tests():
     """Run all local tests."""
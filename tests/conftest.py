@@ -0,0 +1,85 @@
+"""
+Shared pytest fixtures.
+
+The modules under test import boto3 at import time, so they are imported
+inside session-scoped fixtures rather than at the top of each test file;
+collection stays cheap and boto3 only loads once a test needs it.
+"""
+
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# The Lambda modules build boto3 clients at import, which happens during
+# collection and needs a region; Lambda itself always provides one
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+@pytest.fixture(scope="module")
+def stub_boto3_client():
+    """Hand out MagicMock clients for one module; moto-backed tests must not request it."""
+    import boto3
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(boto3, 'client', lambda *args, **kwargs: MagicMock())
+        yield
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_sleep():
+    """Make time.sleep a no-op so botocore retry backoff never stalls a test."""
+    import time
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(time, 'sleep', lambda *args: None)
+        yield
+
+@pytest.fixture(scope="session")
+def mock_s3_ctx():
+    """moto's S3 mock, imported only once a test asks for it; use as `with mock_s3_ctx():`."""
+    from moto import mock_s3
+    return mock_s3
+
+@pytest.fixture(scope="session")
+def bedrock_client_class():
+    """The BedrockClient class, imported on first use."""
+    from utils.bedrock_client import BedrockClient
+    return BedrockClient
+
+@pytest.fixture(scope="session")
+def image_processor_class():
+    """The ImageProcessor class, imported on first use."""
+    from utils.image_processor import ImageProcessor
+    return ImageProcessor
+
+@pytest.fixture(scope="session")
+def llm_lambda_handler():
+    """The LLM Lambda handler, imported on first use."""
+    from lambdas.llm_handler.lambda_function import lambda_handler
+    return lambda_handler
+
+@pytest.fixture(scope="session")
+def rekognition_lambda_handler():
+    """The Rekognition Lambda handler, imported on first use."""
+    from lambdas.rekognition_handler.lambda_function import lambda_handler
+    return lambda_handler
+
+@pytest.fixture(scope="session")
+def lambda_context():
+    """Minimal Lambda context; the handlers only read plain attributes from it."""
+    return SimpleNamespace(function_name='test-function', aws_request_id='test-request-id')
+
+@pytest.fixture(scope="session")
+def empty_rekognition_results():
+    """Rekognition results with no features or barriers; read-only, copy before mutating."""
+    return {
+        'accessibility_analysis': {
+            'accessibility_features': [],
+            'potential_barriers': [],
+            'summary': {'accessibility_score': 50.0}
+        }
+    }
+
+@pytest.fixture(scope="module")
+def bedrock_client(bedrock_client_class, stub_boto3_client):
+    """One BedrockClient per test module; creating the boto3 client is the slow part."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('BEDROCK_MODEL_ID', 'test-model')
+        yield bedrock_client_class()
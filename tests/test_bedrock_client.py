@@ -2,31 +2,44 @@
 Tests for the BedrockClient utility.
 """
 
-import json
+import orjson
 import pytest
-from unittest.mock import Mock, patch
-import sys
-import os
+from unittest.mock import Mock
 
-# Add the project root to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils.bedrock_client import BedrockClient
+# Canned model outputs, encoded once and shared by the tests below
+_RECOMMENDATION = {
+    "title": "Test Recommendation",
+    "description": "Test description",
+    "priority": "high",
+    "category": "safety",
+    "estimated_cost": "low"
+}
+_IMPROVEMENT = {
+    "title": "Test Improvement",
+    "description": "Test improvement description",
+    "implementation_difficulty": "easy",
+    "category": "equipment",
+    "estimated_impact": "high"
+}
+_REC_JSON = orjson.dumps([_RECOMMENDATION]).decode()
+_IMP_JSON = orjson.dumps([_IMPROVEMENT]).decode()
+_MOCK_BEDROCK_BODY = orjson.dumps({'content': [{'text': 'Test response'}]})
+_MOCK_STREAM_EVENTS = (
+    {'chunk': {'bytes': orjson.dumps({'type': 'message_start'})}},
+    {'chunk': {'bytes': orjson.dumps({'type': 'content_block_delta', 'delta': {'text': 'Test '}})}},
+    {'chunk': {'bytes': orjson.dumps({'type': 'content_block_delta', 'delta': {'text': 'response'}})}},
+    {'chunk': {'bytes': orjson.dumps({'type': 'message_stop'})}}
+)
 
 class TestBedrockClient:
     """Test cases for the BedrockClient utility."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        with patch.dict(os.environ, {'BEDROCK_MODEL_ID': 'test-model'}):
-            self.client = BedrockClient()
-    
-    def test_init(self):
+    def test_init(self, bedrock_client):
         """Test BedrockClient initialization."""
-        assert self.client.model_id == 'test-model'
-        assert self.client.bedrock is not None
+        assert bedrock_client.model_id == 'test-model'
+        assert bedrock_client.bedrock is not None
     
-    def test_prepare_analysis_context(self):
+    def test_prepare_analysis_context(self, bedrock_client):
         """Test context preparation for LLM."""
         rekognition_results = {
             'accessibility_analysis': {
@@ -44,7 +57,7 @@ class TestBedrockClient:
         
         image_metadata = {'bucket': 'test-bucket', 'key': 'test.jpg'}
         
-        context = self.client._prepare_analysis_context(rekognition_results, image_metadata)
+        context = bedrock_client._prepare_analysis_context(rekognition_results, image_metadata)
         
         assert 'Ramp' in context
         assert 'Step' in context
@@ -52,10 +65,10 @@ class TestBedrockClient:
         assert 'Chair' in context
         assert 'Furniture' in context
     
-    def test_create_recommendations_prompt(self):
+    def test_create_recommendations_prompt(self, bedrock_client):
         """Test recommendations prompt creation."""
         context = "Test context with accessibility features"
-        prompt = self.client._create_recommendations_prompt(context)
+        prompt = bedrock_client._create_recommendations_prompt(context)
         
         assert context in prompt
         assert "accessibility expert" in prompt
@@ -63,10 +76,10 @@ class TestBedrockClient:
         assert "title" in prompt
         assert "priority" in prompt
     
-    def test_create_improvements_prompt(self):
+    def test_create_improvements_prompt(self, bedrock_client):
         """Test improvements prompt creation."""
         context = "Test context with barriers"
-        prompt = self.client._create_improvements_prompt(context)
+        prompt = bedrock_client._create_improvements_prompt(context)
         
         assert context in prompt
         assert "accessibility expert" in prompt
@@ -74,134 +87,154 @@ class TestBedrockClient:
         assert "title" in prompt
         assert "implementation_difficulty" in prompt
     
-    @patch('utils.bedrock_client.BedrockClient._call_bedrock')
-    def test_generate_accessibility_recommendations_success(self, mock_call_bedrock):
+    def test_generate_accessibility_recommendations_success(self, bedrock_client, bedrock_client_class, empty_rekognition_results, monkeypatch):
         """Test successful recommendations generation."""
         # Mock Bedrock response
-        mock_response = json.dumps([
-            {
-                "title": "Test Recommendation",
-                "description": "Test description",
-                "priority": "high",
-                "category": "safety",
-                "estimated_cost": "low"
-            }
-        ])
-        mock_call_bedrock.return_value = mock_response
+        monkeypatch.setattr(bedrock_client_class, '_call_bedrock', Mock(return_value=_REC_JSON))
         
-        rekognition_results = {
-            'accessibility_analysis': {
-                'accessibility_features': [],
-                'potential_barriers': [],
-                'summary': {'accessibility_score': 50.0}
-            }
-        }
         image_metadata = {}
         
-        recommendations = self.client.generate_accessibility_recommendations(
-            rekognition_results, image_metadata
+        recommendations = bedrock_client.generate_accessibility_recommendations(
+            empty_rekognition_results, image_metadata
         )
         
         assert len(recommendations) == 1
         assert recommendations[0]['title'] == "Test Recommendation"
         assert recommendations[0]['priority'] == "high"
     
-    @patch('utils.bedrock_client.BedrockClient._call_bedrock')
-    def test_generate_improvement_suggestions_success(self, mock_call_bedrock):
+    def test_generate_improvement_suggestions_success(self, bedrock_client, bedrock_client_class, empty_rekognition_results, monkeypatch):
         """Test successful improvements generation."""
         # Mock Bedrock response
-        mock_response = json.dumps([
-            {
-                "title": "Test Improvement",
-                "description": "Test improvement description",
-                "implementation_difficulty": "easy",
-                "category": "equipment",
-                "estimated_impact": "high"
-            }
-        ])
-        mock_call_bedrock.return_value = mock_response
+        monkeypatch.setattr(bedrock_client_class, '_call_bedrock', Mock(return_value=_IMP_JSON))
         
-        rekognition_results = {
-            'accessibility_analysis': {
-                'accessibility_features': [],
-                'potential_barriers': [],
-                'summary': {'accessibility_score': 50.0}
-            }
-        }
         image_metadata = {}
         
-        improvements = self.client.generate_improvement_suggestions(
-            rekognition_results, image_metadata
+        improvements = bedrock_client.generate_improvement_suggestions(
+            empty_rekognition_results, image_metadata
         )
         
         assert len(improvements) == 1
         assert improvements[0]['title'] == "Test Improvement"
         assert improvements[0]['implementation_difficulty'] == "easy"
     
-    def test_call_bedrock_success(self):
+    def test_call_bedrock_success(self, bedrock_client, monkeypatch):
         """Test successful Bedrock API call."""
         # Mock Bedrock response
         mock_response = {
             'body': Mock()
         }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'Test response'}]
-        }).encode()
+        mock_response['body'].read.return_value = _MOCK_BEDROCK_BODY
         
-        with patch.object(self.client.bedrock, 'invoke_model', return_value=mock_response):
-            response = self.client._call_bedrock("Test prompt")
-            assert response == 'Test response'
-    
-    def test_parse_recommendations_json_success(self):
-        """Test parsing JSON recommendations."""
-        json_response = json.dumps([
-            {
-                "title": "Test Recommendation",
-                "description": "Test description",
-                "priority": "high",
-                "category": "safety",
-                "estimated_cost": "low"
+        monkeypatch.setattr(bedrock_client.bedrock, 'invoke_model', Mock(return_value=mock_response))
+        response = bedrock_client._call_bedrock("Test prompt")
+        assert response == 'Test response'
+
+    def test_call_bedrock_stream_success(self, bedrock_client, monkeypatch):
+        """Test streaming Bedrock API call joins text deltas."""
+        monkeypatch.setattr(
+            bedrock_client.bedrock,
+            'invoke_model_with_response_stream',
+            Mock(return_value={'body': _MOCK_STREAM_EVENTS})
+        )
+        response = bedrock_client._call_bedrock_stream("Test prompt")
+        assert response == 'Test response'
+
+    def test_generate_cache_hit_skips_bedrock(self, bedrock_client, monkeypatch):
+        """Test a cached response is returned without calling Bedrock."""
+        cache = Mock()
+        cache.get_cached_analysis.return_value = {'text': 'Cached response'}
+        monkeypatch.setattr(bedrock_client, 'cache', cache)
+        monkeypatch.setattr(bedrock_client, 'cache_mode', 'enabled')
+        call_bedrock = Mock()
+        monkeypatch.setattr(bedrock_client, '_call_bedrock', call_bedrock)
+        
+        assert bedrock_client._generate("Test prompt", stream=False) == 'Cached response'
+        call_bedrock.assert_not_called()
+        cache.cache_analysis.assert_not_called()
+
+    def test_generate_cache_miss_stores_response(self, bedrock_client, monkeypatch):
+        """Test a cache miss calls Bedrock and stores the text under the prompt hash."""
+        cache = Mock()
+        cache.get_cached_analysis.return_value = None
+        monkeypatch.setattr(bedrock_client, 'cache', cache)
+        monkeypatch.setattr(bedrock_client, 'cache_mode', 'enabled')
+        monkeypatch.setattr(bedrock_client, '_call_bedrock', Mock(return_value='Test response'))
+        
+        assert bedrock_client._generate("Test prompt", stream=False) == 'Test response'
+        prompt_hash = cache.get_cached_analysis.call_args.args[0]
+        cache.cache_analysis.assert_called_once_with(prompt_hash, {'text': 'Test response'}, analysis_type='bedrock')
+
+    def test_generate_replay_miss_raises(self, bedrock_client, monkeypatch):
+        """Test replay mode refuses to call Bedrock on a cache miss."""
+        from utils.exceptions import LLMError
+        cache = Mock()
+        cache.get_cached_analysis.return_value = None
+        monkeypatch.setattr(bedrock_client, 'cache', cache)
+        monkeypatch.setattr(bedrock_client, 'cache_mode', 'replay')
+        call_bedrock = Mock()
+        monkeypatch.setattr(bedrock_client, '_call_bedrock', call_bedrock)
+        
+        with pytest.raises(LLMError):
+            bedrock_client._generate("Test prompt", stream=False)
+        call_bedrock.assert_not_called()
+
+    def test_context_fingerprint_ignores_confidence_and_order(self, bedrock_client):
+        """Test near-identical scenes map to the same fingerprint and new labels do not."""
+        def results(features, score):
+            return {
+                'accessibility_analysis': {
+                    'accessibility_features': [{'name': name, 'confidence': conf} for name, conf in features],
+                    'potential_barriers': [],
+                    'summary': {'accessibility_score': score}
+                }
             }
-        ])
-        
-        recommendations = self.client._parse_recommendations(json_response)
-        
-        assert len(recommendations) == 1
-        assert recommendations[0]['title'] == "Test Recommendation"
-    
-    def test_parse_recommendations_fallback(self):
-        """Test parsing fallback for non-JSON response."""
-        non_json_response = "This is not JSON"
         
-        recommendations = self.client._parse_recommendations(non_json_response)
+        base = bedrock_client._context_fingerprint(results([('Ramp', 95.0), ('Door', 80.0)], 74.0), {})
+        similar = bedrock_client._context_fingerprint(results([('door', 88.5), ('Ramp', 91.2)], 76.0), {})
+        different = bedrock_client._context_fingerprint(results([('Ramp', 95.0), ('Elevator', 80.0)], 74.0), {})
         
-        assert len(recommendations) == 1
-        assert recommendations[0]['title'] == "General Accessibility Review"
-        assert recommendations[0]['description'] == non_json_response
-    
-    def test_parse_improvements_json_success(self):
-        """Test parsing JSON improvements."""
-        json_response = json.dumps([
-            {
-                "title": "Test Improvement",
-                "description": "Test improvement description",
-                "implementation_difficulty": "easy",
-                "category": "equipment",
-                "estimated_impact": "high"
+        assert base == similar
+        assert base != different
+
+    def test_context_fingerprint_orchestrator_payloads_differ(self, bedrock_client):
+        """Test orchestrator-shaped payloads (lowercase label names, image_count) key apart."""
+        def payload(names, image_count):
+            rekognition_results = {
+                'labels': [{'name': name, 'confidence': 90.0, 'category': 'accessibility'} for name in names],
+                'image_count': image_count
             }
-        ])
+            image_metadata = {'total_images': image_count, 'analysis_type': 'accessibility_assessment'}
+            return rekognition_results, image_metadata
         
-        improvements = self.client._parse_improvements(json_response)
+        stairs = bedrock_client._context_fingerprint(*payload(['Stairs', 'Door'], 2))
+        ramp = bedrock_client._context_fingerprint(*payload(['Ramp', 'Elevator'], 2))
+        more_images = bedrock_client._context_fingerprint(*payload(['Stairs', 'Door'], 5))
         
-        assert len(improvements) == 1
-        assert improvements[0]['title'] == "Test Improvement"
+        assert 'stairs' in stairs
+        assert len({stairs, ramp, more_images}) == 3
+
+    @pytest.mark.parametrize('parser_name, json_response, title', [
+        ('_parse_recommendations', _REC_JSON, _RECOMMENDATION['title']),
+        ('_parse_improvements', _IMP_JSON, _IMPROVEMENT['title']),
+        ('_parse_recommendations', f"Here are the recommendations:\n{_REC_JSON}\nLet me know.", _RECOMMENDATION['title'])
+    ])
+    def test_parse_json_success(self, bedrock_client, parser_name, json_response, title):
+        """Test parsing JSON recommendations and improvements."""
+        parsed = getattr(bedrock_client, parser_name)(json_response)
+        
+        assert len(parsed) == 1
+        assert parsed[0]['title'] == title
     
-    def test_parse_improvements_fallback(self):
+    @pytest.mark.parametrize('parser_name, fallback_title', [
+        ('_parse_recommendations', "General Accessibility Review"),
+        ('_parse_improvements', "General Improvement Suggestions")
+    ])
+    def test_parse_fallback(self, bedrock_client, parser_name, fallback_title):
         """Test parsing fallback for non-JSON response."""
         non_json_response = "This is not JSON"
         
-        improvements = self.client._parse_improvements(non_json_response)
+        parsed = getattr(bedrock_client, parser_name)(non_json_response)
         
-        assert len(improvements) == 1
-        assert improvements[0]['title'] == "General Improvement Suggestions"
-        assert improvements[0]['description'] == non_json_response
+        assert len(parsed) == 1
+        assert parsed[0]['title'] == fallback_title
+        assert parsed[0]['description'] == non_json_response
@@ -0,0 +1,99 @@
+"""
+Tests for the caching utilities.
+"""
+
+import json
+import time
+import boto3
+import pytest
+from unittest.mock import Mock
+
+from utils.cache import ImageAnalysisCache
+
+_TABLE = 'test-cache'
+
+def _item(cache, image_key):
+    """Stored cache item for an image, unexpired."""
+    return {
+        'cache_key': cache._generate_cache_key(image_key, 'accessibility'),
+        'analysis_result': json.dumps({'image_key': image_key}),
+        'ttl': int(time.time()) + 3600
+    }
+
+@pytest.fixture
+def cache(monkeypatch):
+    """ImageAnalysisCache over a Mock DynamoDB resource."""
+    monkeypatch.setattr(boto3, 'resource', lambda *args, **kwargs: Mock())
+    return ImageAnalysisCache(_TABLE)
+
+class TestImageAnalysisCache:
+    """Test cases for ImageAnalysisCache batch reads."""
+    
+    def test_get_cached_analyses_chunks_at_batch_limit(self, cache):
+        """Test more than 100 distinct keys are split into BatchGetItem calls of at most 100."""
+        image_keys = [f'image{i}.jpg' for i in range(130)]
+        
+        def batch_get_item(RequestItems):
+            keys = {key['cache_key'] for key in RequestItems[_TABLE]['Keys']}
+            return {'Responses': {_TABLE: [
+                _item(cache, image_key) for image_key in image_keys
+                if cache._generate_cache_key(image_key, 'accessibility') in keys
+            ]}}
+        
+        cache.dynamodb.batch_get_item.side_effect = batch_get_item
+        
+        # Duplicates are collapsed before chunking
+        found = cache.get_cached_analyses(image_keys + image_keys[:5])
+        
+        chunk_sizes = [len(call.kwargs['RequestItems'][_TABLE]['Keys']) for call in cache.dynamodb.batch_get_item.call_args_list]
+        assert chunk_sizes == [100, 30]
+        assert set(found) == set(image_keys)
+        assert found['image5.jpg'] == {'image_key': 'image5.jpg'}
+    
+    def test_get_cached_analyses_retries_unprocessed_keys(self, cache):
+        """Test UnprocessedKeys are requested again and their hits returned."""
+        unprocessed = {_TABLE: {'Keys': [{'cache_key': cache._generate_cache_key('b.jpg', 'accessibility')}]}}
+        cache.dynamodb.batch_get_item.side_effect = [
+            {'Responses': {_TABLE: [_item(cache, 'a.jpg')]}, 'UnprocessedKeys': unprocessed},
+            {'Responses': {_TABLE: [_item(cache, 'b.jpg')]}, 'UnprocessedKeys': {}}
+        ]
+        
+        found = cache.get_cached_analyses(['a.jpg', 'b.jpg'])
+        
+        assert set(found) == {'a.jpg', 'b.jpg'}
+        assert cache.dynamodb.batch_get_item.call_args_list[1].kwargs['RequestItems'] == unprocessed
+    
+    def test_get_cached_analyses_gives_up_after_max_attempts(self, cache, monkeypatch):
+        """Test sustained throttling stops after the attempt cap with backoff and keeps partial hits."""
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        unprocessed = {_TABLE: {'Keys': [{'cache_key': cache._generate_cache_key('b.jpg', 'accessibility')}]}}
+        cache.dynamodb.batch_get_item.side_effect = [
+            {'Responses': {_TABLE: [_item(cache, 'a.jpg')]}, 'UnprocessedKeys': unprocessed}
+        ] + [{'Responses': {}, 'UnprocessedKeys': unprocessed}] * 10
+        
+        found = cache.get_cached_analyses(['a.jpg', 'b.jpg'])
+        
+        assert set(found) == {'a.jpg'}
+        assert cache.dynamodb.batch_get_item.call_count == ImageAnalysisCache.BATCH_GET_MAX_ATTEMPTS
+        assert sleeps == sorted(sleeps) and len(sleeps) == ImageAnalysisCache.BATCH_GET_MAX_ATTEMPTS - 1
+        assert sleeps[1] == 2 * sleeps[0]
+
+class TestConnectionPool:
+    """Test cases for ConnectionPool client reuse."""
+    
+    def test_get_client_reuses_client_for_equal_configs(self, monkeypatch):
+        """Test separately built but equal Configs share one pooled client."""
+        from botocore.config import Config
+        from utils.cache import ConnectionPool
+        
+        monkeypatch.setattr(ConnectionPool, '_clients', {})
+        monkeypatch.setattr(boto3, 'client', lambda *args, **kwargs: Mock())
+        
+        def retry_config(max_attempts):
+            return Config(retries={'mode': 'adaptive', 'max_attempts': max_attempts})
+        
+        first = ConnectionPool.get_client('rekognition', config=retry_config(6))
+        
+        assert ConnectionPool.get_client('rekognition', config=retry_config(6)) is first
+        assert ConnectionPool.get_client('rekognition', config=retry_config(3)) is not first
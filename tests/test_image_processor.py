@@ -3,35 +3,43 @@ Tests for the ImageProcessor utility.
 """
 
 import pytest
-from unittest.mock import Mock, patch
-import sys
-import os
+from unittest.mock import Mock
 
-# Add the project root to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+@pytest.fixture(scope="module")
+def rekognition_mock():
+    """Rekognition client limited to the calls ImageProcessor makes."""
+    return Mock(spec=['detect_objects', 'detect_labels'])
 
-from utils.image_processor import ImageProcessor
+@pytest.fixture(scope="module")
+def s3_mock():
+    """S3 client; ImageProcessor never calls it."""
+    return Mock(spec=[])
+
+@pytest.fixture(scope="module")
+def processor(image_processor_class, rekognition_mock, s3_mock):
+    """One ImageProcessor for the module, wired to the shared mocks."""
+    return image_processor_class(rekognition_mock, s3_mock)
+
+@pytest.fixture
+def mock_rekognition(rekognition_mock):
+    """The shared Rekognition mock, cleared of the previous test's canned responses."""
+    rekognition_mock.reset_mock(return_value=True, side_effect=True)
+    return rekognition_mock
 
 class TestImageProcessor:
     """Test cases for the ImageProcessor utility."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.mock_rekognition = Mock()
-        self.mock_s3 = Mock()
-        self.processor = ImageProcessor(self.mock_rekognition, self.mock_s3)
-    
-    def test_analyze_accessibility_features_success(self):
+    def test_analyze_accessibility_features_success(self, processor, mock_rekognition):
         """Test successful accessibility analysis."""
         # Mock Rekognition responses
-        self.mock_rekognition.detect_objects.return_value = {
+        mock_rekognition.detect_objects.return_value = {
             'ObjectLabels': [
                 {'Name': 'Chair', 'Confidence': 95.0},
                 {'Name': 'Table', 'Confidence': 90.0}
             ]
         }
         
-        self.mock_rekognition.detect_labels.return_value = {
+        mock_rekognition.detect_labels.return_value = {
             'Labels': [
                 {'Name': 'Furniture', 'Confidence': 85.0},
                 {'Name': 'Indoor', 'Confidence': 95.0}
@@ -39,7 +47,7 @@ class TestImageProcessor:
         }
         
         # Call the method
-        result = self.processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
+        result = processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
         
         # Assertions
         assert 'objects' in result
@@ -53,17 +61,17 @@ class TestImageProcessor:
         assert 'potential_barriers' in analysis
         assert 'summary' in analysis
     
-    def test_analyze_accessibility_features_with_ramp(self):
+    def test_analyze_accessibility_features_with_ramp(self, processor, mock_rekognition):
         """Test analysis with accessibility features like ramps."""
         # Mock Rekognition responses with accessibility features
-        self.mock_rekognition.detect_objects.return_value = {
+        mock_rekognition.detect_objects.return_value = {
             'ObjectLabels': [
                 {'Name': 'Ramp', 'Confidence': 95.0},
                 {'Name': 'Handrail', 'Confidence': 90.0}
             ]
         }
         
-        self.mock_rekognition.detect_labels.return_value = {
+        mock_rekognition.detect_labels.return_value = {
             'Labels': [
                 {'Name': 'Accessible', 'Confidence': 85.0},
                 {'Name': 'Wheelchair', 'Confidence': 80.0}
@@ -71,7 +79,7 @@ class TestImageProcessor:
         }
         
         # Call the method
-        result = self.processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
+        result = processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
         
         # Check that accessibility features are detected
         analysis = result['accessibility_analysis']
@@ -82,17 +90,17 @@ class TestImageProcessor:
         assert 'Ramp' in feature_names
         assert 'Handrail' in feature_names
     
-    def test_analyze_accessibility_features_with_barriers(self):
+    def test_analyze_accessibility_features_with_barriers(self, processor, mock_rekognition):
         """Test analysis with potential barriers."""
         # Mock Rekognition responses with barriers
-        self.mock_rekognition.detect_objects.return_value = {
+        mock_rekognition.detect_objects.return_value = {
             'ObjectLabels': [
                 {'Name': 'Step', 'Confidence': 95.0},
                 {'Name': 'Narrow Doorway', 'Confidence': 90.0}
             ]
         }
         
-        self.mock_rekognition.detect_labels.return_value = {
+        mock_rekognition.detect_labels.return_value = {
             'Labels': [
                 {'Name': 'Stairs', 'Confidence': 85.0},
                 {'Name': 'Obstacle', 'Confidence': 80.0}
@@ -100,7 +108,7 @@ class TestImageProcessor:
         }
         
         # Call the method
-        result = self.processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
+        result = processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
         
         # Check that barriers are detected
         analysis = result['accessibility_analysis']
@@ -111,7 +119,7 @@ class TestImageProcessor:
         assert 'Step' in barrier_names
         assert 'Narrow Doorway' in barrier_names
     
-    def test_calculate_accessibility_score(self):
+    def test_calculate_accessibility_score(self, processor):
         """Test accessibility score calculation."""
         # Test with features and barriers
         features = [
@@ -122,37 +130,37 @@ class TestImageProcessor:
             {'name': 'Step', 'confidence': 85.0}
         ]
         
-        score = self.processor._calculate_accessibility_score(features, barriers)
+        score = processor._calculate_accessibility_score(features, barriers)
         
         # Should be positive due to more features than barriers
         assert score > 50
         assert 0 <= score <= 100
     
-    def test_calculate_accessibility_score_no_data(self):
+    def test_calculate_accessibility_score_no_data(self, processor):
         """Test accessibility score with no data."""
-        score = self.processor._calculate_accessibility_score([], [])
+        score = processor._calculate_accessibility_score([], [])
         
         # Should return neutral score
         assert score == 50.0
     
-    def test_detect_objects_error(self):
+    def test_detect_objects_error(self, processor, mock_rekognition):
         """Test error handling in object detection."""
         # Mock Rekognition to raise exception
-        self.mock_rekognition.detect_objects.side_effect = Exception("Rekognition error")
-        self.mock_rekognition.detect_labels.return_value = {'Labels': []}
+        mock_rekognition.detect_objects.side_effect = Exception("Rekognition error")
+        mock_rekognition.detect_labels.return_value = {'Labels': []}
         
         # Should not raise exception, should return empty objects
-        result = self.processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
+        result = processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
         
         assert result['objects'] == []
     
-    def test_detect_labels_error(self):
+    def test_detect_labels_error(self, processor, mock_rekognition):
         """Test error handling in label detection."""
         # Mock Rekognition to raise exception
-        self.mock_rekognition.detect_objects.return_value = {'ObjectLabels': []}
-        self.mock_rekognition.detect_labels.side_effect = Exception("Rekognition error")
+        mock_rekognition.detect_objects.return_value = {'ObjectLabels': []}
+        mock_rekognition.detect_labels.side_effect = Exception("Rekognition error")
         
         # Should not raise exception, should return empty labels
-        result = self.processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
+        result = processor.analyze_accessibility_features('test-bucket', 'test-image.jpg')
         
         assert result['labels'] == []
@@ -2,127 +2,119 @@
 Unit tests for the LLM Handler Lambda function.
 """
 
-import json
+import orjson
 import pytest
-import os
-from unittest.mock import patch, MagicMock
-from moto import mock_bedrock
+from unittest.mock import Mock, MagicMock
 import boto3
 
-# Add the project root to the path
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from lambdas.llm_handler.lambda_function import (
     lambda_handler,
     BedrockClient
 )
 
+# Static Bedrock payload, serialized once at import
+_BEDROCK_RECS = [
+    {
+        'title': 'Install Grab Bars',
+        'description': 'Add grab bars in the bathroom for safety',
+        'priority': 'high',
+        'category': 'safety',
+        'estimated_cost': 'low'
+    },
+    {
+        'title': 'Widen Doorways',
+        'description': 'Consider widening doorways for wheelchair access',
+        'priority': 'medium',
+        'category': 'structural',
+        'estimated_cost': 'high'
+    }
+]
+_BEDROCK_RECS_TEXT = orjson.dumps(_BEDROCK_RECS).decode()
+_BEDROCK_OK_BODY = orjson.dumps({'content': [{'text': _BEDROCK_RECS_TEXT}]}).decode()
+_BEDROCK_OK_STREAM = (
+    {'chunk': {'bytes': orjson.dumps({'type': 'content_block_delta', 'delta': {'text': _BEDROCK_RECS_TEXT}})}},
+)
+
+def _bedrock_mock(body=_BEDROCK_OK_BODY, stream=_BEDROCK_OK_STREAM):
+    """Bedrock runtime stub limited to the invoke calls BedrockClient makes."""
+    mock = Mock(spec=['invoke_model', 'invoke_model_with_response_stream'])
+    mock.invoke_model.return_value = {'body': body}
+    mock.invoke_model_with_response_stream.return_value = {'body': stream}
+    return mock
+
 class TestLLMHandler:
     """Test cases for the LLM Handler Lambda function."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        os.environ['BEDROCK_MODEL_ID'] = 'anthropic.claude-3-sonnet-20240229-v1:0'
+    @pytest.fixture(autouse=True)
+    def _env(self, monkeypatch):
+        """Set up test environment; monkeypatch restores it even if a test fails."""
+        monkeypatch.setenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
     
-    def teardown_method(self):
-        """Clean up after tests."""
-        if 'BEDROCK_MODEL_ID' in os.environ:
-            del os.environ['BEDROCK_MODEL_ID']
+    @pytest.fixture(autouse=True)
+    def _patch_boto(self, monkeypatch):
+        """Route every boto3 client to one Bedrock stub the test can configure."""
+        mock_bedrock = _bedrock_mock()
+        monkeypatch.setattr(boto3, 'client', lambda *args, **kwargs: mock_bedrock)
+        self.mock_bedrock = mock_bedrock
     
-    @mock_bedrock
-    def test_lambda_handler_success(self):
+    def test_lambda_handler_success(self, lambda_context):
         """Test successful LLM processing."""
-        # Mock Bedrock response
-        with patch('boto3.client') as mock_client:
-            mock_bedrock = MagicMock()
-            mock_bedrock.invoke_model.return_value = {
-                'body': json.dumps({
-                    'content': [{
-                        'text': json.dumps([
-                            {
-                                'title': 'Install Grab Bars',
-                                'description': 'Add grab bars in the bathroom for safety',
-                                'priority': 'high',
-                                'category': 'safety',
-                                'estimated_cost': 'low'
-                            },
-                            {
-                                'title': 'Widen Doorways',
-                                'description': 'Consider widening doorways for wheelchair access',
-                                'priority': 'medium',
-                                'category': 'structural',
-                                'estimated_cost': 'high'
-                            }
-                        ])
-                    }])
-                })
-            }
-            mock_client.return_value = mock_bedrock
-            
-            event = {
-                'rekognition_results': {
-                    'labels': [
-                        {'name': 'Stairs', 'confidence': 95.5, 'category': 'accessibility'},
-                        {'name': 'Door', 'confidence': 88.2, 'category': 'accessibility'}
-                    ]
-                },
-                'image_metadata': {
-                    'total_images': 2,
-                    'analysis_type': 'accessibility_assessment'
-                }
+        event = {
+            'rekognition_results': {
+                'labels': [
+                    {'name': 'Stairs', 'confidence': 95.5, 'category': 'accessibility'},
+                    {'name': 'Door', 'confidence': 88.2, 'category': 'accessibility'}
+                ]
+            },
+            'image_metadata': {
+                'total_images': 2,
+                'analysis_type': 'accessibility_assessment'
             }
-            
-            context = MagicMock()
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 200
-            body = json.loads(response['body'])
-            assert 'recommendations' in body
-            assert 'improvements' in body
-            assert len(body['recommendations']) > 0
-            assert len(body['improvements']) > 0
+        }
+        
+        response = lambda_handler(event, lambda_context)
+        
+        assert response['statusCode'] == 200
+        body = orjson.loads(response['body'])
+        assert 'recommendations' in body
+        assert 'improvements' in body
+        assert len(body['recommendations']) > 0
+        assert len(body['improvements']) > 0
     
-    def test_lambda_handler_missing_rekognition_results(self):
+    def test_lambda_handler_missing_rekognition_results(self, lambda_context):
         """Test handler with missing rekognition results."""
         event = {
             'image_metadata': {}
         }
         
-        context = MagicMock()
-        
-        response = lambda_handler(event, context)
+        response = lambda_handler(event, lambda_context)
         
         assert response['statusCode'] == 400
-        body = json.loads(response['body'])
+        body = orjson.loads(response['body'])
         assert 'error' in body
         assert 'No rekognition results provided' in body['error']
     
-    def test_lambda_handler_bedrock_error(self):
-        """Test handler with Bedrock error."""
-        with patch('boto3.client') as mock_client:
-            mock_bedrock = MagicMock()
-            mock_bedrock.invoke_model.side_effect = Exception("Bedrock error")
-            mock_client.return_value = mock_bedrock
-            
-            event = {
-                'rekognition_results': {
-                    'labels': [{'name': 'Stairs', 'confidence': 95.5}]
-                },
-                'image_metadata': {}
-            }
-            
-            context = MagicMock()
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 500
-            body = json.loads(response['body'])
-            assert 'error' in body
-            assert 'Internal server error' in body['error']
+    def test_lambda_handler_bedrock_error(self, lambda_context):
+        """Test a Bedrock error degrades to empty results rather than failing the request."""
+        self.mock_bedrock.invoke_model.side_effect = Exception("Bedrock error")
+        self.mock_bedrock.invoke_model_with_response_stream.side_effect = Exception("Bedrock error")
+        
+        event = {
+            'rekognition_results': {
+                'labels': [{'name': 'Stairs', 'confidence': 95.5}]
+            },
+            'image_metadata': {}
+        }
+        
+        response = lambda_handler(event, lambda_context)
+        
+        # generate_* log the failure and return [], so the handler still answers 200
+        assert response['statusCode'] == 200
+        body = orjson.loads(response['body'])
+        assert body['recommendations'] == []
+        assert body['improvements'] == []
     
-    def test_lambda_handler_exception(self):
+    def test_lambda_handler_exception(self, lambda_context, monkeypatch):
         """Test handler with unexpected exception."""
         event = {
             'rekognition_results': {
@@ -131,18 +123,15 @@ class TestLLMHandler:
             'image_metadata': {}
         }
         
-        context = MagicMock()
-        
         # Mock boto3 to raise exception
-        with patch('boto3.client') as mock_client:
-            mock_client.side_effect = Exception("AWS error")
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 500
-            body = json.loads(response['body'])
-            assert 'error' in body
-            assert 'Internal server error' in body['error']
+        monkeypatch.setattr(boto3, 'client', MagicMock(side_effect=Exception("AWS error")))
+        
+        response = lambda_handler(event, lambda_context)
+        
+        assert response['statusCode'] == 500
+        body = orjson.loads(response['body'])
+        assert 'error' in body
+        assert 'Internal server error' in body['error']
     
     def test_bedrock_client_init(self):
         """Test BedrockClient initialization."""
@@ -150,10 +139,8 @@ class TestLLMHandler:
         assert client.model_id == 'anthropic.claude-3-sonnet-20240229-v1:0'
         assert client.bedrock is not None
     
-    def test_bedrock_client_prepare_analysis_context(self):
+    def test_bedrock_client_prepare_analysis_context(self, bedrock_client):
         """Test context preparation for LLM."""
-        client = BedrockClient()
-        
         rekognition_results = {
             'accessibility_analysis': {
                 'accessibility_features': [
@@ -170,7 +157,7 @@ class TestLLMHandler:
         
         image_metadata = {'bucket': 'test-bucket', 'key': 'test.jpg'}
         
-        context = client._prepare_analysis_context(rekognition_results, image_metadata)
+        context = bedrock_client._prepare_analysis_context(rekognition_results, image_metadata)
         
         assert 'Ramp' in context
         assert 'Step' in context
@@ -178,11 +165,10 @@ class TestLLMHandler:
         assert 'Chair' in context
         assert 'Furniture' in context
     
-    def test_bedrock_client_create_recommendations_prompt(self):
+    def test_bedrock_client_create_recommendations_prompt(self, bedrock_client):
         """Test recommendations prompt creation."""
-        client = BedrockClient()
         context = "Test context with accessibility features"
-        prompt = client._create_recommendations_prompt(context)
+        prompt = bedrock_client._create_recommendations_prompt(context)
         
         assert context in prompt
         assert "accessibility expert" in prompt
@@ -190,11 +176,10 @@ class TestLLMHandler:
         assert "title" in prompt
         assert "priority" in prompt
     
-    def test_bedrock_client_create_improvements_prompt(self):
+    def test_bedrock_client_create_improvements_prompt(self, bedrock_client):
         """Test improvements prompt creation."""
-        client = BedrockClient()
         context = "Test context with barriers"
-        prompt = client._create_improvements_prompt(context)
+        prompt = bedrock_client._create_improvements_prompt(context)
         
         assert context in prompt
         assert "accessibility expert" in prompt
@@ -202,60 +187,41 @@ class TestLLMHandler:
         assert "title" in prompt
         assert "implementation_difficulty" in prompt
     
-    def test_bedrock_client_parse_recommendations_success(self):
-        """Test parsing JSON recommendations."""
-        client = BedrockClient()
-        json_response = json.dumps([
-            {
-                "title": "Test Recommendation",
-                "description": "Test description",
-                "priority": "high",
-                "category": "safety",
-                "estimated_cost": "low"
-            }
-        ])
-        
-        recommendations = client._parse_recommendations(json_response)
-        
-        assert len(recommendations) == 1
-        assert recommendations[0]['title'] == "Test Recommendation"
+    @pytest.mark.parametrize('parser_name, item', [
+        ('_parse_recommendations', {
+            "title": "Test Recommendation",
+            "description": "Test description",
+            "priority": "high",
+            "category": "safety",
+            "estimated_cost": "low"
+        }),
+        ('_parse_improvements', {
+            "title": "Test Improvement",
+            "description": "Test improvement description",
+            "implementation_difficulty": "easy",
+            "category": "equipment",
+            "estimated_impact": "high"
+        })
+    ])
+    def test_bedrock_client_parse_success(self, bedrock_client, parser_name, item):
+        """Test parsing JSON recommendations and improvements."""
+        json_response = orjson.dumps([item]).decode()
+        
+        parsed = getattr(bedrock_client, parser_name)(json_response)
+        
+        assert len(parsed) == 1
+        assert parsed[0]['title'] == item['title']
     
-    def test_bedrock_client_parse_recommendations_fallback(self):
+    @pytest.mark.parametrize('parser_name, fallback_title', [
+        ('_parse_recommendations', "General Accessibility Review"),
+        ('_parse_improvements', "General Improvement Suggestions")
+    ])
+    def test_bedrock_client_parse_fallback(self, bedrock_client, parser_name, fallback_title):
         """Test parsing fallback for non-JSON response."""
-        client = BedrockClient()
-        non_json_response = "This is not JSON"
-        
-        recommendations = client._parse_recommendations(non_json_response)
-        
-        assert len(recommendations) == 1
-        assert recommendations[0]['title'] == "General Accessibility Review"
-        assert recommendations[0]['description'] == non_json_response
-    
-    def test_bedrock_client_parse_improvements_success(self):
-        """Test parsing JSON improvements."""
-        client = BedrockClient()
-        json_response = json.dumps([
-            {
-                "title": "Test Improvement",
-                "description": "Test improvement description",
-                "implementation_difficulty": "easy",
-                "category": "equipment",
-                "estimated_impact": "high"
-            }
-        ])
-        
-        improvements = client._parse_improvements(json_response)
-        
-        assert len(improvements) == 1
-        assert improvements[0]['title'] == "Test Improvement"
-    
-    def test_bedrock_client_parse_improvements_fallback(self):
-        """Test parsing fallback for non-JSON response."""
-        client = BedrockClient()
         non_json_response = "This is not JSON"
         
-        improvements = client._parse_improvements(non_json_response)
+        parsed = getattr(bedrock_client, parser_name)(non_json_response)
         
-        assert len(improvements) == 1
-        assert improvements[0]['title'] == "General Improvement Suggestions"
-        assert improvements[0]['description'] == non_json_response
+        assert len(parsed) == 1
+        assert parsed[0]['title'] == fallback_title
+        assert parsed[0]['description'] == non_json_response
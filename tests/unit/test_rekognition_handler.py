@@ -2,16 +2,9 @@
 Unit tests for the Rekognition Handler Lambda function.
 """
 
-import json
+import orjson
 import pytest
-import os
-from unittest.mock import patch, MagicMock
-from moto import mock_rekognition
-import boto3
-
-# Add the project root to the path
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from unittest.mock import MagicMock
 
 from lambdas.rekognition_handler.lambda_function import (
     lambda_handler,
@@ -21,105 +14,143 @@ from lambdas.rekognition_handler.lambda_function import (
 class TestRekognitionHandler:
     """Test cases for the Rekognition Handler Lambda function."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        os.environ['AWS_REGION'] = 'us-east-1'
-    
-    def teardown_method(self):
-        """Clean up after tests."""
-        if 'AWS_REGION' in os.environ:
-            del os.environ['AWS_REGION']
+    @pytest.fixture(autouse=True)
+    def _env(self, monkeypatch):
+        """Set up test environment; monkeypatch restores it even if a test fails."""
+        monkeypatch.setenv('AWS_REGION', 'us-east-1')
     
-    @mock_rekognition
-    def test_lambda_handler_success(self):
+    def test_lambda_handler_success(self, lambda_context, monkeypatch):
         """Test successful Rekognition processing."""
         # Mock Rekognition response
-        with patch('boto3.client') as mock_client:
-            mock_rekognition = MagicMock()
-            mock_rekognition.detect_labels.return_value = {
-                'Labels': [
-                    {'Name': 'Stairs', 'Confidence': 95.5},
-                    {'Name': 'Door', 'Confidence': 88.2},
-                    {'Name': 'Bathroom', 'Confidence': 92.1},
-                    {'Name': 'Kitchen', 'Confidence': 85.7},
-                    {'Name': 'Furniture', 'Confidence': 78.3}
-                ]
-            }
-            mock_client.return_value = mock_rekognition
-            
-            event = {
-                'bucket': 'test-bucket',
-                'key': 'test-image.jpg'
-            }
-            
-            context = MagicMock()
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 200
-            body = json.loads(response['body'])
-            assert 'labels' in body
-            assert 'image_key' in body
-            assert body['image_key'] == 'test-image.jpg'
-            
-            # Check that only accessibility-relevant labels are returned
-            label_names = [label['name'] for label in body['labels']]
-            assert 'Stairs' in label_names
-            assert 'Door' in label_names
-            assert 'Bathroom' in label_names
-            assert 'Kitchen' in label_names
-            assert 'Furniture' not in label_names  # Should be filtered out
+        mock_rekognition = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.rekognition', mock_rekognition)
+        mock_rekognition.detect_labels.return_value = {
+            'Labels': [
+                {'Name': 'Stairs', 'Confidence': 95.5},
+                {'Name': 'Door', 'Confidence': 88.2},
+                {'Name': 'Bathroom', 'Confidence': 92.1},
+                {'Name': 'Kitchen', 'Confidence': 85.7},
+                {'Name': 'Furniture', 'Confidence': 78.3}
+            ]
+        }
+        
+        event = {
+            'bucket': 'test-bucket',
+            'key': 'test-image.jpg'
+        }
+        
+        response = lambda_handler(event, lambda_context)
+        
+        assert response['statusCode'] == 200
+        body = orjson.loads(response['body'])
+        assert 'labels' in body
+        assert 'image_key' in body
+        assert body['image_key'] == 'test-image.jpg'
+        
+        # Check that only accessibility-relevant labels are returned
+        label_names = [label['name'] for label in body['labels']]
+        assert 'Stairs' in label_names
+        assert 'Door' in label_names
+        assert 'Bathroom' in label_names
+        assert 'Kitchen' in label_names
+        assert 'Furniture' not in label_names  # Should be filtered out
+
+    def test_lambda_handler_raw_result(self, lambda_context, monkeypatch):
+        """Test that raw_result returns the result without the HTTP envelope."""
+        mock_rekognition = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.rekognition', mock_rekognition)
+        mock_rekognition.detect_labels.return_value = {
+            'Labels': [{'Name': 'Ramp', 'Confidence': 91.0}]
+        }
+
+        event = {
+            'bucket': 'test-bucket',
+            'key': 'test-image.jpg',
+            'raw_result': True
+        }
+
+        response = lambda_handler(event, lambda_context)
+
+        assert response['ok'] is True
+        assert response['key'] == 'test-image.jpg'
+        assert response['labels'][0]['name'] == 'Ramp'
+
+    def test_lambda_handler_publishes_reply(self, lambda_context, monkeypatch):
+        """Test that a reply_queue_url event publishes the result on the module SQS client."""
+        mock_rekognition = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.rekognition', mock_rekognition)
+        mock_rekognition.detect_labels.return_value = {
+            'Labels': [{'Name': 'Ramp', 'Confidence': 91.0}]
+        }
+        mock_sqs = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.sqs', mock_sqs)
+
+        event = {
+            'bucket': 'test-bucket',
+            'key': 'test-image.jpg',
+            'raw_result': True,
+            'reply_queue_url': 'https://sqs/run-queue',
+            'job_id': 'job-1'
+        }
+
+        response = lambda_handler(event, lambda_context)
+
+        send_kwargs = mock_sqs.send_message.call_args.kwargs
+        assert send_kwargs['QueueUrl'] == 'https://sqs/run-queue'
+        assert orjson.loads(send_kwargs['MessageBody']) == response
+        assert send_kwargs['MessageAttributes']['job_id']['StringValue'] == 'job-1'
+        assert send_kwargs['MessageAttributes']['image_key']['StringValue'] == 'test-image.jpg'
+
+    def test_lambda_handler_raw_result_error(self, lambda_context):
+        """Test raw_result failure shape."""
+        response = lambda_handler({'key': 'test-image.jpg', 'raw_result': True}, lambda_context)
+
+        assert response['ok'] is False
+        assert response['error'] == 'Missing bucket in event'
     
-    def test_lambda_handler_missing_bucket(self):
+    def test_lambda_handler_missing_bucket(self, lambda_context):
         """Test handler with missing bucket."""
         event = {
             'key': 'test-image.jpg'
         }
         
-        context = MagicMock()
-        
-        response = lambda_handler(event, context)
+        response = lambda_handler(event, lambda_context)
         
         assert response['statusCode'] == 400
-        body = json.loads(response['body'])
+        body = orjson.loads(response['body'])
         assert 'error' in body
         assert 'Missing bucket' in body['error']
     
-    def test_lambda_handler_missing_key(self):
+    def test_lambda_handler_missing_key(self, lambda_context):
         """Test handler with missing key."""
         event = {
             'bucket': 'test-bucket'
         }
         
-        context = MagicMock()
-        
-        response = lambda_handler(event, context)
+        response = lambda_handler(event, lambda_context)
         
         assert response['statusCode'] == 400
-        body = json.loads(response['body'])
+        body = orjson.loads(response['body'])
         assert 'error' in body
         assert 'Missing key' in body['error']
     
-    def test_lambda_handler_rekognition_error(self):
+    def test_lambda_handler_rekognition_error(self, lambda_context, monkeypatch):
         """Test handler with Rekognition error."""
-        with patch('boto3.client') as mock_client:
-            mock_rekognition = MagicMock()
-            mock_rekognition.detect_labels.side_effect = Exception("Rekognition error")
-            mock_client.return_value = mock_rekognition
-            
-            event = {
-                'bucket': 'test-bucket',
-                'key': 'test-image.jpg'
-            }
-            
-            context = MagicMock()
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 500
-            body = json.loads(response['body'])
-            assert 'error' in body
-            assert 'Internal server error' in body['error']
+        mock_rekognition = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.rekognition', mock_rekognition)
+        mock_rekognition.detect_labels.side_effect = Exception("Rekognition error")
+        
+        event = {
+            'bucket': 'test-bucket',
+            'key': 'test-image.jpg'
+        }
+        
+        response = lambda_handler(event, lambda_context)
+        
+        assert response['statusCode'] == 500
+        body = orjson.loads(response['body'])
+        assert 'error' in body
+        assert 'Internal server error' in body['error']
     
     def test_filter_accessibility_labels(self):
         """Test accessibility label filtering."""
@@ -179,22 +210,21 @@ class TestRekognitionHandler:
         filtered = filter_accessibility_labels(labels)
         assert filtered == []
     
-    def test_lambda_handler_exception(self):
+    def test_lambda_handler_exception(self, lambda_context, monkeypatch):
         """Test handler with unexpected exception."""
         event = {
             'bucket': 'test-bucket',
             'key': 'test-image.jpg'
         }
         
-        context = MagicMock()
-        
-        # Mock boto3 to raise exception
-        with patch('boto3.client') as mock_client:
-            mock_client.side_effect = Exception("AWS error")
-            
-            response = lambda_handler(event, context)
-            
-            assert response['statusCode'] == 500
-            body = json.loads(response['body'])
-            assert 'error' in body
-            assert 'Internal server error' in body['error']
+        # Mock Rekognition client to raise exception
+        mock_rekognition = MagicMock()
+        monkeypatch.setattr('lambdas.rekognition_handler.lambda_function.rekognition', mock_rekognition)
+        mock_rekognition.detect_labels.side_effect = Exception("AWS error")
+        
+        response = lambda_handler(event, lambda_context)
+        
+        assert response['statusCode'] == 500
+        body = orjson.loads(response['body'])
+        assert 'error' in body
+        assert 'Internal server error' in body['error']
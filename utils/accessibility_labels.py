@@ -0,0 +1,61 @@
+"""
+Rekognition label detection and accessibility filtering shared by the
+Rekognition handler and the orchestrator.
+"""
+
+import re
+from typing import Dict, Any, List
+
+# Accessibility-relevant keywords, matched as case-insensitive substrings
+ACCESSIBILITY_KEYWORDS = (
+    'stairs', 'ramp', 'door', 'doorway', 'bathroom', 'bedroom',
+    'kitchen', 'hallway', 'entrance', 'elevator', 'lift',
+    'wheelchair', 'grab bar', 'handrail', 'step', 'threshold'
+)
+
+# Compiled once so each label name is checked in a single regex scan
+ACCESSIBILITY_PATTERN = re.compile(
+    '|'.join(re.escape(keyword) for keyword in ACCESSIBILITY_KEYWORDS),
+    re.IGNORECASE
+)
+
+def detect_labels_for_image(rekognition_client, bucket: str, key: str) -> List[Dict[str, Any]]:
+    """
+    Detect labels in an S3 image and keep the accessibility-relevant ones.
+    
+    Args:
+        rekognition_client: Boto3 Rekognition client
+        bucket: S3 bucket name
+        key: S3 object key
+        
+    Returns:
+        List of filtered accessibility-relevant labels
+    """
+    # Only general labels are used; name matching stays client-side because the
+    # keywords are substrings ("Steps", "Sliding Door"), not exact Rekognition
+    # label names that LabelInclusionFilters could express
+    response = rekognition_client.detect_labels(
+        Image={'S3Object': {'Bucket': bucket, 'Name': key}},
+        MaxLabels=50,
+        MinConfidence=70,
+        Features=['GENERAL_LABELS']
+    )
+    return filter_accessibility_labels(response.get('Labels', []))
+
+def filter_accessibility_labels(labels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Filter labels to only include accessibility-relevant ones.
+    
+    Args:
+        labels: List of labels from Rekognition
+        
+    Returns:
+        List of filtered accessibility-relevant labels
+    """
+    # Rekognition always sets Name and Confidence on each label
+    return [
+        {'name': name, 'confidence': round(label['Confidence'], 2), 'category': 'accessibility'}
+        for label in labels
+        for name in (label['Name'],)
+        if ACCESSIBILITY_PATTERN.search(name)
+    ]
@@ -4,15 +4,25 @@ Optimizes multiple image analyses by batching API calls.
 """
 
 import json
+import os
 import time
 from typing import Dict, Any, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
 from utils.structured_logger import get_logger
 from utils.exceptions import RekognitionError, handle_aws_error
-from utils.cache import ConnectionPool, BatchProcessor, PerformanceMonitor
+from utils.cache import ConnectionPool, PerformanceMonitor
+from utils.accessibility_labels import filter_accessibility_labels
 
 logger = get_logger(__name__)
 
+# A throttled image is retried with backoff in place instead of failing; adaptive
+# mode also rate-limits the shared client so concurrent workers stay under the TPS limit
+_REKOGNITION_RETRY_CONFIG = Config(retries={
+    'mode': 'adaptive',
+    'max_attempts': int(os.getenv('REKOGNITION_MAX_ATTEMPTS', '6'))
+})
+
 class RekognitionBatchProcessor:
     """Batch processor for Rekognition operations."""
     
@@ -21,17 +31,17 @@ class RekognitionBatchProcessor:
         Initialize batch processor.
         
         Args:
-            max_concurrent: Maximum concurrent operations
-            batch_size: Number of images per batch
+            max_concurrent: Maximum concurrent Rekognition calls
+            batch_size: Kept for compatibility; images are no longer grouped
         """
         self.max_concurrent = max_concurrent
         self.batch_size = batch_size
-        self.rekognition = ConnectionPool.get_client('rekognition')
+        self.rekognition = ConnectionPool.get_client('rekognition', config=_REKOGNITION_RETRY_CONFIG)
         self.performance_monitor = PerformanceMonitor()
     
     def process_images_batch(self, images: List[Dict[str, str]]) -> List[Dict[str, Any]]:
         """
-        Process multiple images in batches.
+        Process multiple images concurrently, one Rekognition call per worker.
         
         Args:
             images: List of image objects with bucket and key
@@ -42,37 +52,29 @@ class RekognitionBatchProcessor:
         timer_id = self.performance_monitor.start_timer("batch_rekognition")
         
         try:
-            # Create batches
-            batch_processor = BatchProcessor(self.batch_size)
-            batches = batch_processor.create_batches(images)
-            
-            logger.info(f"Processing {len(images)} images in {len(batches)} batches")
+            logger.info(f"Processing {len(images)} images with up to {self.max_concurrent} concurrent calls")
             
-            # Process batches concurrently
+            # One future per image: each call is network-bound, so grouping images
+            # into batches would only serialize them inside a worker thread
             all_results = []
             with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
-                # Submit all batches
-                future_to_batch = {
-                    executor.submit(self._process_single_batch, batch): batch 
-                    for batch in batches
+                future_to_image = {
+                    executor.submit(self._analyze_single_image, image): image
+                    for image in images
                 }
                 
                 # Collect results as they complete
-                for future in as_completed(future_to_batch):
-                    batch = future_to_batch[future]
+                for future in as_completed(future_to_image):
+                    image = future_to_image[future]
                     try:
-                        batch_results = future.result()
-                        all_results.extend(batch_results)
-                        logger.info(f"Completed batch with {len(batch_results)} results")
+                        all_results.append(future.result())
                     except Exception as e:
-                        logger.error(f"Batch processing failed: {str(e)}")
-                        # Add error results for failed batch
-                        for image in batch:
-                            all_results.append({
-                                'error': str(e),
-                                'image_key': image.get('key', 'unknown'),
-                                'bucket': image.get('bucket', 'unknown')
-                            })
+                        logger.error(f"Error processing image {image.get('key', 'unknown')}: {str(e)}")
+                        all_results.append({
+                            'error': str(e),
+                            'image_key': image.get('key', 'unknown'),
+                            'bucket': image.get('bucket', 'unknown')
+                        })
             
             duration = self.performance_monitor.end_timer(timer_id)
             logger.info(f"Batch processing completed in {duration:.2f}s")
@@ -86,32 +88,6 @@ class RekognitionBatchProcessor:
                 operation="process_images_batch"
             )
     
-    def _process_single_batch(self, batch: List[Dict[str, str]]) -> List[Dict[str, Any]]:
-        """
-        Process a single batch of images.
-        
-        Args:
-            batch: List of images in the batch
-            
-        Returns:
-            List of analysis results for the batch
-        """
-        results = []
-        
-        for image in batch:
-            try:
-                result = self._analyze_single_image(image)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error processing image {image.get('key', 'unknown')}: {str(e)}")
-                results.append({
-                    'error': str(e),
-                    'image_key': image.get('key', 'unknown'),
-                    'bucket': image.get('bucket', 'unknown')
-                })
-        
-        return results
-    
     def _analyze_single_image(self, image: Dict[str, str]) -> Dict[str, Any]:
         """
         Analyze a single image with Rekognition.
@@ -132,7 +108,7 @@ class RekognitionBatchProcessor:
             )
             
             # Filter for accessibility-relevant labels
-            accessibility_labels = self._filter_accessibility_labels(response.get('Labels', []))
+            accessibility_labels = filter_accessibility_labels(response.get('Labels', []))
             
             return {
                 'image_key': image['key'],
@@ -147,38 +123,6 @@ class RekognitionBatchProcessor:
             logger.error(f"Rekognition analysis failed for {image.get('key', 'unknown')}: {str(e)}")
             raise handle_aws_error(e, "detect_labels", "rekognition")
     
-    def _filter_accessibility_labels(self, labels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Filter labels for accessibility relevance.
-        
-        Args:
-            labels: List of detected labels
-            
-        Returns:
-            Filtered accessibility-relevant labels
-        """
-        accessibility_keywords = {
-            'stairs', 'ramp', 'door', 'doorway', 'bathroom', 'bedroom', 
-            'kitchen', 'hallway', 'entrance', 'elevator', 'lift', 
-            'wheelchair', 'grab bar', 'handrail', 'step', 'threshold'
-        }
-        
-        filtered_labels = []
-        
-        for label in labels:
-            label_name = label.get('Name', '').lower()
-            confidence = label.get('Confidence', 0)
-            
-            # Check if label name contains any accessibility keywords
-            if any(keyword in label_name for keyword in accessibility_keywords):
-                filtered_labels.append({
-                    'name': label.get('Name'),
-                    'confidence': round(confidence, 2),
-                    'category': 'accessibility'
-                })
-        
-        return filtered_labels
-    
     def get_batch_statistics(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Get statistics for batch processing results.
@@ -190,11 +134,18 @@ class RekognitionBatchProcessor:
             Processing statistics
         """
         total_images = len(results)
-        successful_analyses = len([r for r in results if 'error' not in r])
-        failed_analyses = total_images - successful_analyses
+        successful_analyses = 0
+        total_labels = 0
+        accessibility_labels = 0
+        
+        # One pass over the successful results for all three totals
+        for r in results:
+            if 'error' not in r:
+                successful_analyses += 1
+                total_labels += r.get('total_labels', 0)
+                accessibility_labels += r.get('accessibility_labels', 0)
         
-        total_labels = sum(r.get('total_labels', 0) for r in results if 'error' not in r)
-        accessibility_labels = sum(r.get('accessibility_labels', 0) for r in results if 'error' not in r)
+        failed_analyses = total_images - successful_analyses
         
         return {
             'total_images': total_images,
@@ -234,35 +185,33 @@ class OptimizedRekognitionClient:
             List of analysis results
         """
         results = []
-        cache_hits = 0
-        cache_misses = 0
+        uncached_images = images
         
-        # Check cache for each image
+        # Look up every image in one batched cache read
         if self.cache:
+            cached_results = self.cache.get_cached_analyses([image['key'] for image in images])
+            uncached_images = []
             for image in images:
-                cached_result = self.cache.get_cached_analysis(image['key'])
+                cached_result = cached_results.get(image['key'])
                 if cached_result:
                     results.append(cached_result)
-                    cache_hits += 1
                 else:
-                    cache_misses += 1
+                    uncached_images.append(image)
+        
+        cache_hits = len(results)
+        cache_misses = len(uncached_images)
         
         # Process uncached images in batches
-        if cache_misses > 0:
-            uncached_images = [img for img in images if not any(
-                r.get('image_key') == img['key'] for r in results
-            )]
-            
+        if uncached_images:
             batch_results = self.batch_processor.process_images_batch(uncached_images)
             
-            # Cache new results
+            # Cache new results in one batched write
             if self.cache:
-                for result in batch_results:
-                    if 'error' not in result:
-                        self.cache.cache_analysis(
-                            result['image_key'], 
-                            result
-                        )
+                self.cache.cache_analyses({
+                    result['image_key']: result
+                    for result in batch_results
+                    if 'error' not in result
+                })
             
             results.extend(batch_results)
         
@@ -3,26 +3,74 @@ Amazon Bedrock client for generating accessibility recommendations
 using Large Language Models.
 """
 
-import json
+import orjson
+import hashlib
 import boto3
+from botocore.config import Config
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from utils.logger import get_logger
+from utils.exceptions import LLMError
 
 logger = get_logger(__name__)
 
+# Adaptive retries back off exponentially on throttling and pace requests through
+# a client-side token bucket, so a burst settles at the account's Bedrock limit
+_BEDROCK_CONFIG = Config(retries={
+    'mode': 'adaptive',
+    'max_attempts': int(os.getenv('BEDROCK_MAX_ATTEMPTS', '6'))
+})
+
+def _extract_json_array(response: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Decode the JSON array in a model response.
+    
+    The prompts ask for a bare JSON array, so the whole response is decoded first;
+    the bracket slice is only needed when the model wraps the array in prose.
+    
+    Args:
+        response: Raw model output
+        
+    Returns:
+        The decoded array, or None if the response contains no brackets
+    """
+    if response.lstrip().startswith('['):
+        try:
+            return orjson.loads(response)
+        except orjson.JSONDecodeError:
+            pass
+    
+    json_start = response.find('[')
+    json_end = response.rfind(']') + 1
+    if json_start == -1 or json_end <= json_start:
+        return None
+    return orjson.loads(response[json_start:json_end])
+
+def _label_name(label: Dict[str, Any]) -> str:
+    """Name of a raw Rekognition label ("Name") or a filtered one ("name")."""
+    return label.get('name') or label.get('Name') or 'Unknown'
+
 class BedrockClient:
     """Handles interactions with Amazon Bedrock for LLM processing."""
     
     def __init__(self):
         """Initialize the Bedrock client."""
-        self.bedrock = boto3.client('bedrock-runtime')
+        self.bedrock = boto3.client('bedrock-runtime', config=_BEDROCK_CONFIG)
         self.model_id = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
+        
+        # Response cache: 'enabled' reads and writes, 'replay' only reads, 'disabled' skips it
+        self.cache_mode = os.getenv('BEDROCK_CACHE_MODE', 'disabled').lower()
+        self.cache = None
+        cache_table = os.getenv('CACHE_TABLE_NAME')
+        if cache_table and self.cache_mode in ('enabled', 'replay'):
+            from utils.cache import ImageAnalysisCache
+            self.cache = ImageAnalysisCache(cache_table)
     
     def generate_accessibility_recommendations(
         self, 
         rekognition_results: Dict[str, Any], 
-        image_metadata: Dict[str, Any]
+        image_metadata: Dict[str, Any],
+        stream: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Generate accessibility recommendations based on analysis results.
@@ -30,6 +78,7 @@ class BedrockClient:
         Args:
             rekognition_results: Results from Rekognition analysis
             image_metadata: Additional image metadata
+            stream: Read the model output as a stream instead of a single buffered body
             
         Returns:
             List of accessibility recommendations
@@ -41,8 +90,11 @@ class BedrockClient:
             # Create prompt for accessibility recommendations
             prompt = self._create_recommendations_prompt(context)
             
+            # Near-identical scenes share a cache entry through the fingerprint
+            cache_basis = f"recommendations|{self._context_fingerprint(rekognition_results, image_metadata)}" if self.cache else None
+            
             # Call Bedrock
-            response = self._call_bedrock(prompt)
+            response = self._generate(prompt, stream, cache_basis)
             
             # Parse and return recommendations
             return self._parse_recommendations(response)
@@ -54,7 +106,8 @@ class BedrockClient:
     def generate_improvement_suggestions(
         self, 
         rekognition_results: Dict[str, Any], 
-        image_metadata: Dict[str, Any]
+        image_metadata: Dict[str, Any],
+        stream: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Generate improvement suggestions for accessibility.
@@ -62,6 +115,7 @@ class BedrockClient:
         Args:
             rekognition_results: Results from Rekognition analysis
             image_metadata: Additional image metadata
+            stream: Read the model output as a stream instead of a single buffered body
             
         Returns:
             List of improvement suggestions
@@ -73,8 +127,11 @@ class BedrockClient:
             # Create prompt for improvement suggestions
             prompt = self._create_improvements_prompt(context)
             
+            # Near-identical scenes share a cache entry through the fingerprint
+            cache_basis = f"improvements|{self._context_fingerprint(rekognition_results, image_metadata)}" if self.cache else None
+            
             # Call Bedrock
-            response = self._call_bedrock(prompt)
+            response = self._generate(prompt, stream, cache_basis)
             
             # Parse and return suggestions
             return self._parse_improvements(response)
@@ -111,15 +168,41 @@ class BedrockClient:
         
         # Add detected objects and labels
         if rekognition_results.get('objects'):
-            objects = [obj.get('Name', 'Unknown') for obj in rekognition_results['objects']]
+            objects = [_label_name(obj) for obj in rekognition_results['objects']]
             context_parts.append(f"Objects detected: {', '.join(objects)}")
         
         if rekognition_results.get('labels'):
-            labels = [label.get('Name', 'Unknown') for label in rekognition_results['labels']]
+            labels = [_label_name(label) for label in rekognition_results['labels']]
             context_parts.append(f"Labels detected: {', '.join(labels)}")
         
         return '; '.join(context_parts)
     
+    def _context_fingerprint(self, rekognition_results: Dict[str, Any], image_metadata: Dict[str, Any]) -> str:
+        """
+        Reduce analysis results to what shapes the model's answer, for cache keys.
+        
+        Confidences and label order differ between otherwise identical scenes, so
+        only the sorted distinct names per section and the score rounded to the
+        nearest 5 points are kept, along with the image count and metadata.
+        """
+        analysis = rekognition_results.get('accessibility_analysis', {})
+        score = analysis.get('summary', {}).get('accessibility_score')
+        if isinstance(score, (int, float)):
+            score = 5 * round(score / 5)
+        
+        sections = (
+            {f['name'].lower() for f in analysis.get('accessibility_features') or ()},
+            {b['name'].lower() for b in analysis.get('potential_barriers') or ()},
+            {_label_name(obj).lower() for obj in rekognition_results.get('objects') or ()},
+            {_label_name(label).lower() for label in rekognition_results.get('labels') or ()}
+        )
+        return '|'.join([
+            *(','.join(sorted(names)) for names in sections),
+            str(score),
+            str(rekognition_results.get('image_count')),
+            orjson.dumps(image_metadata or {}, option=orjson.OPT_SORT_KEYS).decode()
+        ])
+    
     def _create_recommendations_prompt(self, context: str) -> str:
         """Create prompt for accessibility recommendations."""
         return f"""
@@ -162,42 +245,100 @@ Format your response as a JSON array of improvements, each with:
 - estimated_impact: "high", "medium", or "low"
 """
     
+    def _generate(self, prompt: str, stream: bool, cache_basis: Optional[str] = None) -> str:
+        """
+        Get the model output for a prompt, serving repeats from the response cache.
+        
+        Args:
+            prompt: Prompt to send to the model
+            stream: Read the model output as a stream instead of a single buffered body
+            cache_basis: String the cache key is derived from; defaults to the prompt
+            
+        Returns:
+            Model output text
+            
+        Raises:
+            LLMError: In replay mode, when the prompt has no cached response
+        """
+        if self.cache is None:
+            return self._call_bedrock_stream(prompt) if stream else self._call_bedrock(prompt)
+        
+        # Streamed and buffered calls yield the same text, so they share one entry
+        prompt_hash = hashlib.sha256(f"{self.model_id}|{cache_basis or prompt}".encode()).hexdigest()
+        cached = self.cache.get_cached_analysis(prompt_hash, analysis_type='bedrock')
+        if cached is not None:
+            return cached['text']
+        
+        if self.cache_mode == 'replay':
+            raise LLMError(
+                f"No cached response for prompt {prompt_hash} in replay mode",
+                operation="generate",
+                model_id=self.model_id
+            )
+        
+        text = self._call_bedrock_stream(prompt) if stream else self._call_bedrock(prompt)
+        self.cache.cache_analysis(prompt_hash, {'text': text}, analysis_type='bedrock')
+        return text
+    
+    def _request_body(self, prompt: str) -> bytes:
+        """Build the serialized Bedrock request body shared by the plain and streaming calls."""
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 2000,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+        return orjson.dumps(body)
+    
     def _call_bedrock(self, prompt: str) -> str:
         """Call Amazon Bedrock with the given prompt."""
         try:
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            }
-            
             response = self.bedrock.invoke_model(
                 modelId=self.model_id,
-                body=json.dumps(body)
+                body=self._request_body(prompt)
             )
             
-            response_body = json.loads(response['body'].read())
+            response_body = orjson.loads(response['body'].read())
             return response_body['content'][0]['text']
             
         except Exception as e:
             logger.error(f"Error calling Bedrock: {str(e)}")
             raise
     
+    def _call_bedrock_stream(self, prompt: str) -> str:
+        """Call Amazon Bedrock with streaming output and join the text deltas as they arrive."""
+        try:
+            response = self.bedrock.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                body=self._request_body(prompt)
+            )
+            
+            parts = []
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                chunk_data = orjson.loads(chunk['bytes'])
+                if chunk_data.get('type') == 'content_block_delta':
+                    parts.append(chunk_data['delta'].get('text', ''))
+            
+            return ''.join(parts)
+            
+        except Exception as e:
+            logger.error(f"Error streaming from Bedrock: {str(e)}")
+            raise
+    
     def _parse_recommendations(self, response: str) -> List[Dict[str, Any]]:
         """Parse LLM response into structured recommendations."""
         try:
             # Extract JSON from response
-            json_start = response.find('[')
-            json_end = response.rfind(']') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                return json.loads(json_str)
+            parsed = _extract_json_array(response)
+            if parsed is not None:
+                return parsed
             else:
                 # Fallback: create a single recommendation
                 return [{
@@ -222,12 +363,9 @@ Format your response as a JSON array of improvements, each with:
         """Parse LLM response into structured improvements."""
         try:
             # Extract JSON from response
-            json_start = response.find('[')
-            json_end = response.rfind(']') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                return json.loads(json_str)
+            parsed = _extract_json_array(response)
+            if parsed is not None:
+                return parsed
             else:
                 # Fallback: create a single improvement
                 return [{
@@ -9,6 +9,7 @@ import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timezone
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from utils.structured_logger import get_logger
 from utils.exceptions import AccessibilityCheckerError, S3Error
@@ -18,6 +19,13 @@ logger = get_logger(__name__)
 class ImageAnalysisCache:
     """DynamoDB-based cache for image analysis results."""
     
+    # DynamoDB's per-request key limit for BatchGetItem
+    BATCH_GET_LIMIT = 100
+    
+    # Retries for UnprocessedKeys, backing off from BATCH_GET_BASE_DELAY seconds
+    BATCH_GET_MAX_ATTEMPTS = 5
+    BATCH_GET_BASE_DELAY = 0.05
+    
     def __init__(self, table_name: str, ttl_hours: int = 24):
         """
         Initialize the cache.
@@ -124,6 +132,96 @@ class ImageAnalysisCache:
             logger.error(f"Unexpected error caching analysis: {str(e)}")
             return False
     
+    def get_cached_analyses(self, image_keys: List[str], analysis_type: str = "accessibility") -> Dict[str, Dict[str, Any]]:
+        """
+        Get cached analysis results for many images with BatchGetItem.
+        
+        Args:
+            image_keys: S3 object keys
+            analysis_type: Type of analysis
+            
+        Returns:
+            Mapping of image key to cached results; misses and expired items are omitted
+        """
+        # BatchGetItem rejects duplicate keys, so each distinct image is asked for once
+        key_by_cache_key = {
+            self._generate_cache_key(image_key, analysis_type): image_key
+            for image_key in image_keys
+        }
+        cache_keys = list(key_by_cache_key)
+        now = int(time.time())
+        found = {}
+        
+        try:
+            for start in range(0, len(cache_keys), self.BATCH_GET_LIMIT):
+                request = {self.table_name: {
+                    'Keys': [{'cache_key': cache_key} for cache_key in cache_keys[start:start + self.BATCH_GET_LIMIT]]
+                }}
+                
+                # Throttled reads come back as UnprocessedKeys and are asked for again
+                # with exponential backoff; whatever is still unread after the last
+                # attempt is treated as a miss
+                for attempt in range(self.BATCH_GET_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(self.BATCH_GET_BASE_DELAY * 2 ** (attempt - 1))
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        if item.get('ttl', 0) >= now:
+                            found[key_by_cache_key[item['cache_key']]] = json.loads(item['analysis_result'])
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        break
+                else:
+                    unread = len(request.get(self.table_name, {}).get('Keys', []))
+                    logger.warning(f"Batch cache lookup gave up on {unread} unprocessed keys")
+            
+            logger.info(f"Batch cache lookup: {len(found)} hits for {len(cache_keys)} keys")
+            return found
+            
+        except ClientError as e:
+            logger.error(f"Error batch retrieving from cache: {str(e)}")
+            return found
+        except Exception as e:
+            logger.error(f"Unexpected error batch retrieving from cache: {str(e)}")
+            return found
+    
+    def cache_analyses(self, analysis_results: Dict[str, Dict[str, Any]], analysis_type: str = "accessibility") -> bool:
+        """
+        Cache analysis results for many images with BatchWriteItem.
+        
+        Args:
+            analysis_results: Mapping of S3 object key to analysis results
+            analysis_type: Type of analysis
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            created_at = datetime.now(timezone.utc).isoformat()
+            ttl = self._get_ttl_timestamp()
+            
+            # batch_writer sends 25-item BatchWriteItem calls and resends unprocessed items
+            with self.table.batch_writer() as batch:
+                for image_key, analysis_result in analysis_results.items():
+                    batch.put_item(Item={
+                        'cache_key': self._generate_cache_key(image_key, analysis_type),
+                        'image_key': image_key,
+                        'analysis_type': analysis_type,
+                        'analysis_result': json.dumps(analysis_result),
+                        'created_at': created_at,
+                        'ttl': ttl
+                    })
+            
+            logger.info(f"Cached {len(analysis_results)} analyses")
+            return True
+            
+        except ClientError as e:
+            logger.error(f"Error batch caching analyses: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error batch caching analyses: {str(e)}")
+            return False
+    
     def invalidate_cache(self, image_key: str, analysis_type: str = "accessibility") -> bool:
         """
         Invalidate cached analysis.
@@ -236,6 +334,15 @@ class BatchProcessor:
 class ConnectionPool:
     """Connection pool for boto3 clients."""
     
+    # Keep-alive sockets, a pool wide enough for the orchestrator fan-out, fast
+    # connect failure and adaptive client-side retry rate limiting
+    DEFAULT_CONFIG = Config(
+        max_pool_connections=64,
+        tcp_keepalive=True,
+        connect_timeout=3,
+        retries={'mode': 'adaptive', 'max_attempts': 2}
+    )
+    
     _clients = {}
     _lock = None
     
@@ -246,20 +353,36 @@ class ConnectionPool:
         
         Args:
             service_name: AWS service name
-            **kwargs: Additional client configuration
+            **kwargs: Additional client configuration; a "config" is merged over DEFAULT_CONFIG
             
         Returns:
             Boto3 client
         """
         # Create a key for the client configuration
-        config_key = f"{service_name}:{hash(frozenset(kwargs.items()))}"
+        config_key = f"{service_name}:{hash(frozenset((name, cls._option_key(value)) for name, value in kwargs.items()))}"
         
         if config_key not in cls._clients:
-            cls._clients[config_key] = boto3.client(service_name, **kwargs)
+            client_kwargs = dict(kwargs)
+            config = client_kwargs.pop('config', None)
+            client_kwargs['config'] = cls.DEFAULT_CONFIG.merge(config) if config else cls.DEFAULT_CONFIG
+            cls._clients[config_key] = boto3.client(service_name, **client_kwargs)
             logger.info(f"Created new client for {service_name}")
         
         return cls._clients[config_key]
     
+    @staticmethod
+    def _option_key(value):
+        """
+        Hashable key for a client keyword argument.
+        
+        Config hashes by identity, so equal configs built separately would each get
+        their own client; they are keyed on their option values instead.
+        """
+        if isinstance(value, Config):
+            options = {name: getattr(value, name, None) for name in Config.OPTION_DEFAULTS}
+            return json.dumps(options, sort_keys=True, default=repr)
+        return value
+    
     @classmethod
     def get_resource(cls, service_name: str, **kwargs):
         """
@@ -33,6 +33,10 @@ class StructuredLogger:
         
         self.logger.addHandler(handler)
     
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a message at this level would be emitted."""
+        return self.logger.isEnabledFor(level)
+    
     def _create_log_entry(
         self,
         level: str,
@@ -78,6 +82,9 @@ class StructuredLogger:
         **kwargs
     ):
         """Log info message with context."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         entry = self._create_log_entry(
             "INFO", message, request_id, function_name, operation, **kwargs
         )
@@ -135,6 +142,9 @@ class StructuredLogger:
         **kwargs
     ):
         """Log debug message with context."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         entry = self._create_log_entry(
             "DEBUG", message, request_id, function_name, operation, **kwargs
         )
@@ -150,6 +160,9 @@ class StructuredLogger:
         **kwargs
     ):
         """Log performance metrics."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         entry = self._create_log_entry(
             "INFO", message, request_id, function_name, operation, duration_ms=duration_ms, **kwargs
         )
@@ -165,6 +178,9 @@ class StructuredLogger:
         **kwargs
     ):
         """Log business metrics."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         entry = self._create_log_entry(
             "INFO", f"Business metric: {metric_name}", request_id, function_name, **kwargs
         )
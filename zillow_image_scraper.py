@@ -18,12 +18,56 @@ import re
 import os
 import sys
 import argparse
+import time
 import boto3
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 from botocore.exceptions import ClientError, NoCredentialsError
+from requests.adapters import HTTPAdapter
+
+# Keep-alive connection pool shared by every session, so repeated fetches to the
+# same hosts (Zillow pages, photos.zillowstatic.com) skip the TCP/TLS handshake
+HTTP_POOL_SIZE = 32
+_http_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE)
+
+
+def get_http_session():
+    """
+    Create a requests session backed by the shared connection pool.
+    
+    Each session keeps its own cookies while reusing pooled connections.
+    
+    Returns:
+        requests.Session: Session with the shared adapter mounted
+    """
+    session = requests.Session()
+    session.mount('https://', _http_adapter)
+    session.mount('http://', _http_adapter)
+    return session
+
+
+# Cookie-less image downloads can share one session across threads
+_image_session = get_http_session()
+
+# Patterns on the common JSON extraction path, compiled once at import
+_STATE_JSON_PATTERNS = [
+    re.compile(pattern, re.DOTALL) for pattern in (
+        r'window\.__INITIAL_STATE__\s*=\s*({.*?});',
+        r'window\.__APP_STATE__\s*=\s*({.*?});',
+        r'window\.__PRELOADED_STATE__\s*=\s*({.*?});',
+        r'window\.__APOLLO_STATE__\s*=\s*({.*?});',
+        r'"photoGallery":\s*(\[.*?\])',
+        r'"images":\s*(\[.*?\])',
+        r'"photos":\s*(\[.*?\])',
+        r'"media":\s*(\[.*?\])'
+    )
+]
+_IMAGE_JSON_OBJECT_PATTERN = re.compile(r'\{[^{}]*(?:"url"|"href"|"src"|"photo"|"image")[^{}]*\}')
+_ZILLOW_PHOTO_ID_PATTERN = re.compile(r'/([a-f0-9]{32})-cc_ft_\d+\.(jpg|webp|png)')
+_ZILLOW_RESOLUTION_PATTERN = re.compile(r'-cc_ft_(\d+)\.')
 
 
 def get_headers():
@@ -74,7 +118,7 @@ def fetch_page_content(url):
         print(f"Fetching page: {url}")
         
         # Create a session to maintain cookies
-        session = requests.Session()
+        session = get_http_session()
         
         # First, try to get the main page
         response = session.get(url, headers=get_headers(), timeout=30)
@@ -130,19 +174,8 @@ def extract_json_from_page(html_content):
                 script_content = script.string
                 
                 # Look for various JSON patterns that might contain image data
-                patterns = [
-                    r'window\.__INITIAL_STATE__\s*=\s*({.*?});',
-                    r'window\.__APP_STATE__\s*=\s*({.*?});',
-                    r'window\.__PRELOADED_STATE__\s*=\s*({.*?});',
-                    r'window\.__APOLLO_STATE__\s*=\s*({.*?});',
-                    r'"photoGallery":\s*(\[.*?\])',
-                    r'"images":\s*(\[.*?\])',
-                    r'"photos":\s*(\[.*?\])',
-                    r'"media":\s*(\[.*?\])'
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, script_content, re.DOTALL)
+                for pattern in _STATE_JSON_PATTERNS:
+                    matches = pattern.findall(script_content)
                     for match in matches:
                         try:
                             if match.startswith('{'):
@@ -164,7 +197,7 @@ def extract_json_from_page(html_content):
         for script in all_scripts:
             if script.string and ('photo' in script.string.lower() or 'image' in script.string.lower()):
                 # Try to find any JSON structure
-                json_matches = re.findall(r'\{[^{}]*(?:"url"|"href"|"src"|"photo"|"image")[^{}]*\}', script.string)
+                json_matches = _IMAGE_JSON_OBJECT_PATTERN.findall(script.string)
                 for match in json_matches:
                     try:
                         json_data = json.loads(match)
@@ -325,7 +358,7 @@ def download_image(url, folder_path, filename):
         bool: True if download successful, False otherwise
     """
     try:
-        response = requests.get(url, headers=get_headers(), timeout=30)
+        response = _image_session.get(url, headers=get_headers(), timeout=30)
         response.raise_for_status()
         
         file_path = os.path.join(folder_path, filename)
@@ -421,7 +454,7 @@ def download_and_upload_to_s3(image_urls, listing_id, bucket_name=None):
             print(f"Processing image {i}/{len(image_urls)}: {url}")
             
             # Download image
-            response = requests.get(url, headers=get_headers(), timeout=30)
+            response = _image_session.get(url, headers=get_headers(), timeout=30)
             response.raise_for_status()
             
             # Extract filename from URL
@@ -457,6 +490,103 @@ def download_and_upload_to_s3(image_urls, listing_id, bucket_name=None):
     }
 
 
+def fetch_and_upload_image(s3_client, url, index, listing_id, bucket_name, max_attempts=3):
+    """
+    Download a single image and upload it to S3, retrying with exponential backoff.
+
+    Args:
+        s3_client: S3 client
+        url (str): Image URL
+        index (int): 1-based position of the image in the listing
+        listing_id (str): Unique identifier for the listing
+        bucket_name (str): S3 bucket name
+        max_attempts (int): Maximum number of download/upload attempts
+
+    Returns:
+        str: S3 URL of the uploaded image, or None if all attempts failed
+    """
+    # Extract filename from URL
+    parsed_url = urlparse(url)
+    filename = os.path.basename(parsed_url.path)
+
+    if not filename or '.' not in filename:
+        filename = f"image_{index:03d}.jpg"
+
+    # Create S3 key with listing folder
+    s3_key = f"listings/{listing_id}/{filename}"
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            response = _image_session.get(url, headers=get_headers(), timeout=30)
+            response.raise_for_status()
+
+            if upload_to_s3(s3_client, response.content, bucket_name, s3_key):
+                print(f"✓ Uploaded: {filename}")
+                return f"https://{bucket_name}.s3.amazonaws.com/{s3_key}"
+
+        except Exception as e:
+            print(f"✗ Error processing {url} (attempt {attempt}/{max_attempts}): {e}")
+
+        if attempt < max_attempts:
+            time.sleep(2 ** (attempt - 1))
+
+    print(f"✗ Failed to upload: {filename}")
+    return None
+
+
+def download_and_upload_to_s3_parallel(image_urls, listing_id, bucket_name=None, max_workers=10):
+    """
+    Download images and upload them to S3 concurrently.
+
+    Each image is fetched and uploaded on a worker thread, so total wall time is
+    bounded by the slowest batch of network round trips rather than their sum.
+
+    Args:
+        image_urls (list): List of image URLs
+        listing_id (str): Unique identifier for the listing
+        bucket_name (str): S3 bucket name
+        max_workers (int): Maximum number of concurrent downloads/uploads
+
+    Returns:
+        dict: Results with success count, S3 URLs and the URLs that failed
+    """
+    if not image_urls:
+        return {"success": 0, "total": 0, "s3_urls": [], "failed": []}
+
+    # Initialize S3 client
+    s3_client = get_s3_client()
+    if not s3_client:
+        print("S3 not available, falling back to local download...")
+        return download_all_images(image_urls, f"zillow_images_{listing_id}")
+
+    # Use default bucket if not specified
+    if not bucket_name:
+        bucket_name = os.getenv('S3_BUCKET_NAME', 'zillow-images')
+
+    print(f"\nDownloading {len(image_urls)} images and uploading to S3 ({max_workers} workers)...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Results are collected in input order so the gallery keeps listing order
+        uploaded = list(executor.map(
+            lambda item: fetch_and_upload_image(s3_client, item[1], item[0], listing_id, bucket_name),
+            enumerate(image_urls, 1)
+        ))
+
+    s3_urls = [s3_url for s3_url in uploaded if s3_url]
+    failed = [url for url, s3_url in zip(image_urls, uploaded) if not s3_url]
+
+    print(f"\nUploaded {len(s3_urls)} out of {len(image_urls)} images to S3.")
+
+    return {
+        "success": len(s3_urls),
+        "total": len(image_urls),
+        "s3_urls": s3_urls,
+        "failed": failed,
+        "bucket": bucket_name,
+        "listing_id": listing_id
+    }
+
+
 def download_all_images(image_urls, folder_name="zillow_images"):
     """
     Download all images to a specified folder.
@@ -611,6 +741,10 @@ def filter_unique_images(image_urls):
     Returns:
         list: List of unique image URLs (highest resolution only)
     """
+    # Nothing to deduplicate
+    if len(image_urls) < 2:
+        return list(image_urls)
+    
     try:
         # Group images by their base identifier (before the resolution suffix)
         image_groups = {}
@@ -618,7 +752,7 @@ def filter_unique_images(image_urls):
         for url in image_urls:
             # Extract the base identifier from Zillow URLs
             # Example: https://photos.zillowstatic.com/fp/abc123-cc_ft_768.jpg -> abc123
-            base_match = re.search(r'/([a-f0-9]{32})-cc_ft_\d+\.(jpg|webp|png)', url)
+            base_match = _ZILLOW_PHOTO_ID_PATTERN.search(url)
             if base_match:
                 base_id = base_match.group(1)
                 if base_id not in image_groups:
@@ -661,7 +795,7 @@ def select_highest_resolution(urls):
         url_resolutions = []
         for url in urls:
             # Look for resolution pattern like -cc_ft_768.jpg
-            res_match = re.search(r'-cc_ft_(\d+)\.', url)
+            res_match = _ZILLOW_RESOLUTION_PATTERN.search(url)
             if res_match:
                 resolution = int(res_match.group(1))
                 url_resolutions.append((resolution, url))